@@ -0,0 +1,72 @@
+import argparse
+import logging
+import time
+import warnings
+
+import numpy as np
+import statsmodels.api as sm
+from statsmodels.tsa.stattools import adfuller
+
+from src.cointegration import rolling_cointegration
+from src.data import generate_synthetic_pairs, read_price_data
+from src.user_inputs import DEFAULT_PARAMS
+
+
+def reference_cointegration(prices1, prices2, lookback_period, first_idx, maxlag):
+
+    # One statsmodels OLS and adfuller call per bar and pair, as in cointegration_test (AIC lag unless fixed)
+    n_bars, n_pairs = prices1.shape
+    is_cointegrated = np.zeros((n_bars, n_pairs), dtype=bool)
+    for j in range(n_pairs):
+        for current_idx in range(first_idx, n_bars):
+            start_idx = max(0, current_idx - lookback_period)
+            resid = sm.OLS(prices1[start_idx:current_idx, j], prices2[start_idx:current_idx, j]).fit().resid
+            adf_result = adfuller(resid, maxlag=maxlag, autolag="AIC" if maxlag is None else None)
+            is_cointegrated[current_idx, j] = adf_result[0] <= adf_result[4]['5%'] and adf_result[1] <= 0.05
+
+    return is_cointegrated
+
+def time_both(prices1, prices2, lookback_period, first_idx, maxlag):
+
+    start = time.perf_counter()
+    reference = reference_cointegration(prices1, prices2, lookback_period, first_idx, maxlag)
+    reference_runtime = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = rolling_cointegration(prices1, prices2, lookback_period, first_idx, maxlag, "AIC" if maxlag is None else None)
+    batched_runtime = time.perf_counter() - start
+
+    return (reference != batched).sum(), reference_runtime, batched_runtime
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Compare batched rolling Engle-Granger tests against per-window statsmodels calls")
+    parser.add_argument('--pairs', type=int, nargs='+', default=[1, 10, 50], help="Synthetic portfolio sizes to time")
+    parser.add_argument('--bars', type=int, default=1000, help="Bars per synthetic pair")
+    parser.add_argument('--maxlag', type=int, default=None, help="Fixed ADF lag (by default the lag is picked by AIC)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    warnings.simplefilter('ignore')
+
+    lookback_period = DEFAULT_PARAMS['lookback_period']
+    first_idx = DEFAULT_PARAMS['initial_end']
+
+    print(f"{'Data':<16} {'Windows':>8} {'Mismatch':>9} {'Reference (s)':>14} {'Batched (s)':>12} {'Speedup':>8}")
+
+    df1, df2 = read_price_data()
+    prices1 = df1['Close'].to_numpy()[:, None]
+    prices2 = df2['Close'].to_numpy()[:, None]
+    mismatch, reference_runtime, batched_runtime = time_both(prices1, prices2, lookback_period, first_idx, args.maxlag)
+    print(f"{'Bundled pair':<16} {len(prices1) - first_idx:>8} {mismatch:>9} {reference_runtime:>14.3f} "
+          f"{batched_runtime:>12.3f} {reference_runtime / batched_runtime:>7.1f}x")
+
+    for n_pairs in args.pairs:
+        prices1, prices2 = generate_synthetic_pairs(n_pairs, args.bars, seed=n_pairs)
+        prices1, prices2 = prices1.to_numpy(), prices2.to_numpy()
+        mismatch, reference_runtime, batched_runtime = time_both(prices1, prices2, lookback_period, first_idx, args.maxlag)
+        print(f"{f'{n_pairs} synthetic':<16} {(args.bars - first_idx) * n_pairs:>8} {mismatch:>9} {reference_runtime:>14.3f} "
+              f"{batched_runtime:>12.3f} {reference_runtime / batched_runtime:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import argparse
+import logging
+import time
+import warnings
+
+from src.data import read_price_data
+from src.scheduling import CointegrationScheduler, compare_verdicts
+from src.trader import cointegration_test
+from src.user_inputs import DEFAULT_PARAMS, DRIFT_MONITORS
+
+
+def run_schedule(df1, df2, lookback_period, first_idx, retest_interval, drift_monitor):
+
+    scheduler = CointegrationScheduler(cointegration_test, retest_interval, drift_monitor)
+
+    # Replay the cointegration checks of the daily loop in run_strategy
+    start = time.perf_counter()
+    verdicts = [scheduler.check(df1, df2, lookback_period, current_idx)[1]
+                for current_idx in range(first_idx, len(df1))]
+    runtime = time.perf_counter() - start
+
+    return verdicts, scheduler.report(), runtime
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Compare cointegration re-test schedules against the every-day test")
+    parser.add_argument('--intervals', type=int, nargs='+', default=[1, 5, 10, 20], help="Re-test intervals to compare")
+    args = parser.parse_args()
+
+    # Per-bar logging would dominate the timings
+    logging.basicConfig(level=logging.ERROR)
+    warnings.simplefilter('ignore')
+
+    df1, df2 = read_price_data()
+    lookback_period = DEFAULT_PARAMS['lookback_period']
+    first_idx = DEFAULT_PARAMS['initial_end']
+
+    reference, _, reference_runtime = run_schedule(df1, df2, lookback_period, first_idx, 1, "None")
+
+    print(f"{'Interval':>8} {'Monitor':<9} {'ADF Calls':>10} {'Saved':>7} {'Triggered':>10} "
+          f"{'Flips':>6} {'Ref Flips':>10} {'Mismatch':>9} {'Speedup':>8}")
+    for retest_interval in args.intervals:
+        for drift_monitor in DRIFT_MONITORS:
+            verdicts, report, runtime = run_schedule(df1, df2, lookback_period, first_idx, retest_interval, drift_monitor)
+            comparison = compare_verdicts(reference, verdicts)
+            print(f"{retest_interval:>8} {drift_monitor:<9} {report['ADF Calls']:>10} {report['ADF Calls Saved']:>7} "
+                  f"{report['Triggered Tests']:>10} {comparison['Scheduled Flips']:>6} {comparison['Reference Flips']:>10} "
+                  f"{comparison['Mismatched Bars']:>9} {reference_runtime / runtime:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import logging
+import time
+import warnings
+
+import numpy as np
+
+from src.data import read_price_data, resample_price_data, scale_window_params
+from src.kalman import KalmanHedgeRatio
+from src.trader import calculate_zscore, run_strategy
+from src.user_inputs import BAR_RESOLUTIONS, DEFAULT_PARAMS, HEDGE_RATIO_MODES
+
+
+def time_strategy(df1, df2, hedge_ratio_mode, resolution, repeats):
+
+    params = dict(DEFAULT_PARAMS, hedge_ratio_mode=hedge_ratio_mode, resolution=resolution)
+
+    # Keep the fastest of several runs to limit timer noise
+    best = float('inf')
+    results = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        results = run_strategy(params, df1, df2, save_results=False)
+        best = min(best, time.perf_counter() - start)
+
+    return best, results
+
+def time_zscore(df1, df2, hedge_ratio_mode, resolution, repeats):
+
+    # Same bars and rescaled windows as run_strategy at this resolution
+    params = DEFAULT_PARAMS
+    bars1, bars2 = resample_price_data(df1, df2, resolution)
+    if resolution != 'Daily':
+        params = scale_window_params(params, len(df1) / len(bars1))
+    initial_start = params['initial_start']
+    initial_end = params['initial_end']
+    prices1 = bars1['Close'].values
+    prices2 = bars2['Close'].values
+
+    # Time only the z-score path of the per-bar loop
+    best = float('inf')
+    zscores = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        zscores = []
+        if hedge_ratio_mode == "Kalman":
+            kalman = KalmanHedgeRatio().warm_up(prices1[:initial_end], prices2[:initial_end])
+            for current_idx in range(initial_end, len(bars1)):
+                zscores.append(kalman.update(prices1[current_idx], prices2[current_idx]))
+        else:
+            start_idx = initial_start
+            for current_idx in range(initial_end, len(bars1)):
+                zscores.append(calculate_zscore(bars1, bars2, start_idx, current_idx))
+                start_idx += 1
+        best = min(best, time.perf_counter() - start)
+
+    # Scale of the z-scores, which the entry threshold assumes to be about one
+    zscores = np.asarray(zscores, dtype=float)
+    return best, zscores.std(), (np.abs(zscores) > params['threshold']).mean() * 100
+
+def count_trades(results):
+    is_open = results['Status'].isin(["BUY", "SELL"]).astype(int)
+    return int(is_open.diff().eq(1).sum() + is_open.iloc[0])
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Compare the log ratio and Kalman hedge ratio modes for runtime and PnL")
+    parser.add_argument('--repeats', type=int, default=3, help="Number of timed runs per mode")
+    parser.add_argument('--resolutions', nargs='+', choices=BAR_RESOLUTIONS, default=BAR_RESOLUTIONS,
+                        help="Bar resolutions to compare the modes at")
+    args = parser.parse_args()
+
+    # Per-bar logging would dominate the timings
+    logging.basicConfig(level=logging.ERROR)
+    warnings.simplefilter('ignore')
+
+    df1, df2 = read_price_data()
+
+    print(f"{'Resolution':<11} {'Mode':<10} {'Z-score (s)':>12} {'Z std':>6} {'Beyond %':>9} "
+          f"{'Strategy (s)':>13} {'Final PnL':>12} {'Trades':>8}")
+    for resolution in args.resolutions:
+        for mode in HEDGE_RATIO_MODES:
+            zscore_runtime, zscore_std, beyond = time_zscore(df1, df2, mode, resolution, args.repeats)
+            strategy_runtime, results = time_strategy(df1, df2, mode, resolution, args.repeats)
+            print(f"{resolution:<11} {mode:<10} {zscore_runtime:>12.4f} {zscore_std:>6.2f} {beyond:>9.1f} "
+                  f"{strategy_runtime:>13.3f} {results['PnL'].iloc[-1]:>12.2f} {count_trades(results):>8}")
+
+if __name__ == "__main__":
+    main()
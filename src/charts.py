@@ -1,9 +1,13 @@
 import matplotlib.pyplot as plt
 import numpy as np
+import pandas as pd
 import logging
 import streamlit as st
 
+from src.diagnostics import DiagnosticsLog
+from src.trade_log import display_trade_log
 from src.trader import run_strategy
+from src.user_inputs import get_params
 
 def plot_pnl(results):
     if results is None or 'PnL' not in results.columns:
@@ -278,7 +282,17 @@ def display_results():
     
     st.markdown("---")
     
-    results = run_strategy()
+    # Reruns with unchanged parameters reuse this session's last backtest and its diagnostics log;
+    # a new run reports into its own log, rendered below
+    params = get_params()
+    run_key = tuple(sorted(params.items()))
+    cached = st.session_state.get('strategy_run')
+    if cached is not None and cached[0] == run_key:
+        _, results, log = cached
+    else:
+        log = DiagnosticsLog(logging.getLogger("src.trader"))
+        results = run_strategy(params, log=log)
+        st.session_state['strategy_run'] = (run_key, results, log)
     
     if results is None:
         st.error("Strategy execution failed. Check logs for details.")
@@ -349,6 +363,12 @@ def display_results():
 
     st.markdown("---")
     
-    # Display results table
-    st.subheader("Trade Log")
-    st.dataframe(results)
+    # Display paginated results table
+    display_trade_log(results)
+
+    # Display captured per-day diagnostics in debug mode
+    if log.debug:
+        st.markdown("---")
+        with st.expander("Diagnostics"):
+            st.dataframe(pd.DataFrame(list(log.counts.items()), columns=['Event', 'Count']))
+            st.dataframe(pd.DataFrame(log.records(), columns=['Event', 'Level', 'Message']))
@@ -0,0 +1,180 @@
+import numpy as np
+from functools import lru_cache
+from statsmodels.tsa.adfvalues import mackinnoncrit, mackinnonp
+
+# Fixed ADF lag used by the batched tests when no lag selection is requested
+DEFAULT_ADF_LAG = 1
+
+# Upper bound on windows solved in one batched call, to cap the memory of the stacked design matrices
+MAX_BATCH_WINDOWS = 20000
+
+
+@lru_cache(maxsize=None)
+def pvalue_threshold(level=0.05):
+
+    # mackinnonp increases with the statistic, so p <= level is the same as stat <= this bisected threshold
+    low, high = -20.0, 5.0
+    for _ in range(100):
+        mid = (low + high) / 2
+        if mackinnonp(mid, regression='c', N=1) <= level:
+            low = mid
+        else:
+            high = mid
+
+    return low
+
+def default_max_lag(n):
+
+    # Schwert's rule, capped as in adfuller for a constant-only regression
+    return min(n // 2 - 2, int(np.ceil(12.0 * np.power(n / 100.0, 1 / 4.0))))
+
+def select_adf_lag(series, maxlag=None):
+    """ADF lag chosen by AIC for each of a stack of equal-length series.
+
+    Matches the lag picked by ``adfuller(row, maxlag=maxlag, autolag="AIC")``.
+    Every candidate regression uses the sample of the largest lag, so the
+    candidates are nested in the column order [constant, level, lag 1, ...]
+    and a single batched QR factorisation gives the residual sum of squares
+    of all of them. Ties go to the shorter lag, as in statsmodels.
+    """
+
+    series = np.asarray(series, dtype=float)
+    n_windows, n = series.shape
+    maxlag = default_max_lag(n) if maxlag is None else maxlag
+
+    xdiff = np.diff(series, axis=1)
+    nobs = n - 1 - maxlag
+    X = np.empty((n_windows, nobs, maxlag + 2))
+    X[:, :, 0] = 1.0
+    X[:, :, 1] = series[:, maxlag:n - 1]
+    for lag in range(1, maxlag + 1):
+        X[:, :, lag + 1] = xdiff[:, maxlag - lag:n - 1 - lag]
+    y = xdiff[:, maxlag:]
+
+    # Residual sum of squares of the first k columns from the projections onto the QR basis
+    Q = np.linalg.qr(X)[0]
+    explained = np.cumsum(np.einsum('bnk,bn->bk', Q, y) ** 2, axis=1)[:, 1:]
+    ssr = np.einsum('bn,bn->b', y, y)[:, None] - explained
+
+    # AIC of each candidate as statsmodels computes it from the Gaussian log-likelihood
+    llf = -nobs / 2 * (np.log(2 * np.pi) + np.log(ssr / nobs) + 1)
+    aic = -2 * llf + 2 * np.arange(2, maxlag + 3)
+
+    return np.argmin(aic, axis=1)
+
+def batched_adf(series, maxlag=DEFAULT_ADF_LAG, autolag=None):
+    """ADF test statistics for a stack of equal-length series in one batched least-squares solve.
+
+    ``series`` has shape (windows, observations). Each row gives the same
+    statistic as ``adfuller(row, maxlag=maxlag, autolag=None)[0]`` with the
+    default constant-only regression. With ``autolag="AIC"`` the lag of each
+    row is picked by ``select_adf_lag`` up to ``maxlag`` (adfuller's default
+    bound when None), matching ``adfuller(row)``, and rows sharing a lag are
+    solved together. Returns (adf_stats, nobs), where nobs holds the number of
+    observations used by each regression.
+    """
+
+    series = np.asarray(series, dtype=float)
+    n_windows, n = series.shape
+
+    if autolag == "AIC":
+        lags = select_adf_lag(series, maxlag)
+        adf_stats = np.empty(n_windows)
+        nobs = np.empty(n_windows, dtype=int)
+        for lag in np.unique(lags):
+            rows = lags == lag
+            adf_stats[rows], nobs[rows] = batched_adf(series[rows], int(lag))
+        return adf_stats, nobs
+    if autolag is not None:
+        raise ValueError(f"Unsupported ADF lag selection: {autolag}")
+
+    if maxlag > n // 2 - 2:
+        raise ValueError(f"ADF lag {maxlag} is too large for windows of {n} observations")
+
+    # Stacked design matrices: lagged level, lagged differences, then the constant
+    xdiff = np.diff(series, axis=1)
+    nobs = n - 1 - maxlag
+    X = np.empty((n_windows, nobs, maxlag + 2))
+    X[:, :, 0] = series[:, maxlag:n - 1]
+    for lag in range(1, maxlag + 1):
+        X[:, :, lag] = xdiff[:, maxlag - lag:n - 1 - lag]
+    X[:, :, -1] = 1.0
+    y = xdiff[:, maxlag:]
+
+    # One batched pseudo-inverse solves every regression, as statsmodels OLS does per window
+    pinv = np.linalg.pinv(X)
+    params = np.einsum('bkn,bn->bk', pinv, y)
+    resid = y - np.einsum('bnk,bk->bn', X, params)
+    scale = np.einsum('bn,bn->b', resid, resid) / (nobs - X.shape[2])
+
+    # t-statistic of the lagged level from the (pinv pinv') covariance diagonal
+    level_var = scale * np.einsum('bn,bn->b', pinv[:, 0, :], pinv[:, 0, :])
+
+    return params[:, 0] / np.sqrt(level_var), np.full(n_windows, nobs)
+
+def batched_engle_granger(x, y, maxlag=DEFAULT_ADF_LAG, autolag=None):
+    """Engle-Granger step of ``cointegration_test`` for a stack of windows.
+
+    ``x`` and ``y`` have shape (windows, observations). Each window regresses
+    x on y without a constant, tests the residuals with ``batched_adf`` (with
+    ``maxlag=None, autolag="AIC"`` this is exactly the test it runs) and
+    applies the same 5% critical value and p-value rule as
+    ``cointegration_test``, the latter as a threshold on the statistic.
+    Returns (hedge_ratios, adf_stats, critical_values, is_cointegrated), with
+    the 5% critical value of each window.
+    """
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    hedge_ratios = np.einsum('bn,bn->b', x, y) / np.einsum('bn,bn->b', y, y)
+    resid = x - hedge_ratios[:, None] * y
+
+    adf_stats, nobs = batched_adf(resid, maxlag, autolag)
+    critical_5 = np.empty(len(adf_stats))
+    for n in np.unique(nobs):
+        critical_5[nobs == n] = mackinnoncrit(N=1, regression='c', nobs=n)[1]
+
+    is_cointegrated = (adf_stats <= critical_5) & (adf_stats <= pvalue_threshold(0.05))
+
+    return hedge_ratios, adf_stats, critical_5, is_cointegrated
+
+def rolling_cointegration(prices1, prices2, lookback_period, first_idx, maxlag=DEFAULT_ADF_LAG, autolag=None):
+    """Cointegration verdicts for every bar from ``first_idx`` on, for one or many pairs.
+
+    ``prices1`` and ``prices2`` are (time x pair) arrays. Bar t uses the same
+    window as ``cointegration_test``, i.e. the up to ``lookback_period`` bars
+    before t. Windows of equal length are stacked across bars and pairs and
+    solved in batches; ``maxlag`` and ``autolag`` are passed on to
+    ``batched_adf``. Returns a (time x pair) boolean array, False before
+    ``first_idx``.
+    """
+
+    prices1 = np.asarray(prices1, dtype=float)
+    prices2 = np.asarray(prices2, dtype=float)
+    if prices1.ndim == 1:
+        return rolling_cointegration(prices1[:, None], prices2[:, None], lookback_period, first_idx, maxlag, autolag)[:, 0]
+
+    n_bars, n_pairs = prices1.shape
+    is_cointegrated = np.zeros((n_bars, n_pairs), dtype=bool)
+
+    # Early bars have shorter windows; each length is its own batch across pairs
+    for current_idx in range(first_idx, min(lookback_period, n_bars)):
+        is_cointegrated[current_idx] = batched_engle_granger(
+            prices1[:current_idx].T, prices2[:current_idx].T, maxlag, autolag
+        )[3]
+
+    # Full-length windows for the remaining bars, stacked as (bar, pair) and solved in chunks
+    full_start = max(first_idx, lookback_period)
+    if full_start < n_bars:
+        windows1 = np.lib.stride_tricks.sliding_window_view(prices1, lookback_period, axis=0)
+        windows2 = np.lib.stride_tricks.sliding_window_view(prices2, lookback_period, axis=0)
+        chunk_bars = max(1, MAX_BATCH_WINDOWS // n_pairs)
+
+        for chunk_start in range(full_start, n_bars, chunk_bars):
+            chunk_end = min(chunk_start + chunk_bars, n_bars)
+            x = windows1[chunk_start - lookback_period:chunk_end - lookback_period].reshape(-1, lookback_period)
+            y = windows2[chunk_start - lookback_period:chunk_end - lookback_period].reshape(-1, lookback_period)
+            is_cointegrated[chunk_start:chunk_end] = batched_engle_granger(x, y, maxlag, autolag)[3].reshape(-1, n_pairs)
+
+    return is_cointegrated
@@ -1,7 +1,31 @@
+import numpy as np
 import pandas as pd
+from functools import lru_cache
 from pathlib import Path
 import logging
 
+# Pandas resample rules for each coarser level of the price pyramid
+RESAMPLE_RULES = {
+    'Weekly': 'W-FRI',
+    'Monthly': 'ME'
+}
+
+# How each CSV column is aggregated into a coarser bar
+OHLCV_AGGREGATION = {
+    'Open': 'first',
+    'High': 'max',
+    'Low': 'min',
+    'Close': 'last',
+    'Volume': 'sum',
+    'Open Interest': 'last'
+}
+
+# Fewest bars the first cointegration window may hold after rescaling
+MIN_COINT_BARS = 20
+
+# Fewest bars the z-score window may hold after rescaling, as required by validate_params
+MIN_ZSCORE_BARS = 5
+
 def read_price_data() -> tuple[pd.DataFrame, pd.DataFrame]:
     try:
         # Define paths relative to data directory
@@ -52,4 +76,93 @@ def validate_lookback_period(df1: pd.DataFrame, df2: pd.DataFrame, lookback_peri
 
     return len(df1) >= lookback_period and len(df2) >= lookback_period
 
+def resample_ohlcv(df: pd.DataFrame, rule: str) -> pd.DataFrame:
+
+    # Aggregate whichever OHLCV columns are present, dropping periods without a close
+    aggregation = {col: how for col, how in OHLCV_AGGREGATION.items() if col in df.columns}
+    return df.resample(rule).agg(aggregation).dropna(subset=['Close'])
+
+def resample_price_data(df1: pd.DataFrame, df2: pd.DataFrame, resolution: str) -> tuple[pd.DataFrame, pd.DataFrame]:
+
+    if resolution == 'Daily':
+        return df1, df2
+
+    if resolution not in RESAMPLE_RULES:
+        raise ValueError(f"Unsupported resolution: {resolution}")
+
+    df1 = resample_ohlcv(df1, RESAMPLE_RULES[resolution])
+    df2 = resample_ohlcv(df2, RESAMPLE_RULES[resolution])
+
+    # Keep the two assets aligned on the same coarse bars
+    common_dates = df1.index.intersection(df2.index)
+    return df1.loc[common_dates], df2.loc[common_dates]
+
+def build_price_pyramid(df1: pd.DataFrame, df2: pd.DataFrame) -> dict[str, tuple[pd.DataFrame, pd.DataFrame]]:
+
+    pyramid = {'Daily': (df1, df2)}
+    for resolution in RESAMPLE_RULES:
+        pyramid[resolution] = resample_price_data(df1, df2, resolution)
+
+    return pyramid
+
+@lru_cache(maxsize=1)
+def read_price_pyramid() -> dict[str, tuple[pd.DataFrame, pd.DataFrame]]:
+
+    # Built once per process and shared between runs, so callers must not modify the frames
+    return build_price_pyramid(*read_price_data())
+
+def scale_window_params(params: dict, bars_per_period: float) -> dict:
+
+    if bars_per_period <= 1:
+        return params
+
+    # Convert day-based windows into bars at the coarser resolution
+    window = max(MIN_ZSCORE_BARS, round((params['initial_end'] - params['initial_start']) / bars_per_period))
+    initial_end = max(round(params['initial_end'] / bars_per_period), MIN_COINT_BARS)
+    initial_start = max(0, initial_end - window)
+    lookback_period = max(round(params['lookback_period'] / bars_per_period), initial_end)
+
+    return dict(params, initial_start=initial_start, initial_end=initial_end, lookback_period=lookback_period)
+
+def floored_windows(params: dict, bars_per_period: float) -> list[str]:
+
+    if bars_per_period <= 1:
+        return []
+
+    # Windows whose rescaled length comes from a floor in scale_window_params rather than from params
+    floored = []
+    if round((params['initial_end'] - params['initial_start']) / bars_per_period) < MIN_ZSCORE_BARS:
+        floored.append("Z-score window")
+    initial_end = round(params['initial_end'] / bars_per_period)
+    if initial_end < MIN_COINT_BARS:
+        floored.append("Initial End Index")
+    if round(params['lookback_period'] / bars_per_period) < max(initial_end, MIN_COINT_BARS):
+        floored.append("Lookback Period")
+
+    return floored
+
+def generate_synthetic_pairs(n_pairs: int, n_bars: int, seed: int | None = None,
+                             start_date: str = "2014-04-01") -> tuple[pd.DataFrame, pd.DataFrame]:
+
+    rng = np.random.default_rng(seed)
+
+    # Asset 2 follows a geometric random walk per pair
+    log_prices2 = np.log(rng.uniform(50, 150, n_pairs)) + np.cumsum(rng.normal(0, 0.01, (n_bars, n_pairs)), axis=0)
+
+    # Asset 1 tracks asset 2 through a hedge ratio plus a mean-reverting (AR(1)) spread
+    hedge_ratio = rng.uniform(0.5, 1.5, n_pairs)
+    intercept = rng.uniform(-0.2, 0.2, n_pairs)
+    persistence = rng.uniform(0.8, 0.98, n_pairs)
+    shocks = rng.normal(0, 0.01, (n_bars, n_pairs))
+    spread = np.zeros((n_bars, n_pairs))
+    for t in range(1, n_bars):
+        spread[t] = persistence * spread[t - 1] + shocks[t]
+    log_prices1 = hedge_ratio * log_prices2 + intercept + spread
+
+    dates = pd.bdate_range(start_date, periods=n_bars, name='Date')
+    columns = [f"Pair_{i}" for i in range(n_pairs)]
 
+    return (
+        pd.DataFrame(np.exp(log_prices1), index=dates, columns=columns),
+        pd.DataFrame(np.exp(log_prices2), index=dates, columns=columns)
+    )
@@ -0,0 +1,67 @@
+import logging
+from collections import deque
+
+
+class DiagnosticsLog:
+    """Structured, rate-limited channel for per-bar diagnostics.
+
+    Every event has a type (e.g. "signal.sell") and a %-style message with its
+    arguments. Events are counted per type and only the first ``rate_limit``
+    of each type in a run are forwarded to ``logger``. Messages are formatted
+    by logging itself, so suppressed or filtered events are never formatted.
+    ``summary`` reports the counts at the end of the run.
+
+    In debug mode every event is also kept, unformatted, in a ring buffer of
+    the last ``buffer_size`` events, which ``records`` formats on demand.
+    """
+
+    def __init__(self, logger=None, rate_limit=5, buffer_size=10000):
+
+        self.logger = logger or logging.getLogger(__name__)
+        self.rate_limit = rate_limit
+        self.debug = False
+        self.counts = {}
+        self.buffer = deque(maxlen=buffer_size)
+
+    def configure(self, debug=False, rate_limit=None, buffer_size=None):
+
+        self.debug = debug
+        if rate_limit is not None:
+            self.rate_limit = rate_limit
+        if buffer_size is not None:
+            self.buffer = deque(maxlen=buffer_size)
+
+    def reset(self):
+
+        self.counts.clear()
+        self.buffer.clear()
+
+    def event(self, event_type, msg, *args, level=logging.INFO):
+
+        count = self.counts.get(event_type, 0) + 1
+        self.counts[event_type] = count
+
+        if self.debug:
+            self.buffer.append((event_type, level, msg, args))
+
+        if count <= self.rate_limit:
+            self.logger.log(level, msg, *args)
+            if count == self.rate_limit:
+                self.logger.log(level, "Further '%s' events suppressed until the end-of-run summary", event_type)
+
+    def records(self):
+        return [(event_type, logging.getLevelName(level), msg % args if args else msg)
+                for event_type, level, msg, args in self.buffer]
+
+    def summary(self):
+
+        total = sum(self.counts.values())
+        suppressed = {event_type: count - self.rate_limit
+                      for event_type, count in self.counts.items() if count > self.rate_limit}
+
+        self.logger.info("Diagnostics summary: %d events across %d types, %d suppressed",
+                         total, len(self.counts), sum(suppressed.values()))
+        for event_type, count in sorted(self.counts.items()):
+            self.logger.info("  %s: %d (%d suppressed)", event_type, count, suppressed.get(event_type, 0))
+
+        return dict(self.counts)
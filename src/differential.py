@@ -0,0 +1,279 @@
+import argparse
+import hashlib
+import json
+import logging
+import time
+import warnings
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.data import generate_synthetic_pairs, read_price_data, resample_price_data, scale_window_params
+from src.portfolio import run_portfolio
+from src.trader import run_strategy
+from src.user_inputs import BAR_RESOLUTIONS, DEFAULT_PARAMS, DRIFT_MONITORS, HEDGE_RATIO_MODES, validate_params
+
+# Trade log columns that every engine must reproduce
+NUMERIC_COLUMNS = ['Z-Score', 'Buy_Price', 'Sell_Price', 'MTM', 'PnL']
+EXACT_COLUMNS = ['Status', 'Is_Cointegrated']
+COMPARED_COLUMNS = NUMERIC_COLUMNS + EXACT_COLUMNS
+
+RTOL = 1e-9
+ATOL = 1e-6
+
+FIXTURE_DIR = Path("fixtures") / "differential"
+
+
+def portfolio_engine(params, df1, df2, coint_method="batched"):
+
+    # Same resampling and window scaling as run_strategy, then a single-pair portfolio
+    resolution = params.get('resolution', DEFAULT_PARAMS['resolution'])
+    base_rows = len(df1)
+    df1, df2 = resample_price_data(df1, df2, resolution)
+    if resolution != 'Daily':
+        params = scale_window_params(params, base_rows / len(df1))
+
+    results = run_portfolio(df1[['Close']], df2[['Close']], params, coint_method=coint_method)
+    if results is None:
+        return None
+
+    return pd.DataFrame({column: results[column].iloc[:, 0] for column in COMPARED_COLUMNS}).rename_axis('Date')
+
+# Alternative engines checked against run_strategy; both cointegration paths of run_portfolio must match it exactly
+ENGINES = {
+    'portfolio': portfolio_engine,
+    'portfolio-reference': partial(portfolio_engine, coint_method="reference")
+}
+
+def random_params(rng):
+
+    # Draw within the sidebar ranges until validate_params accepts the set
+    while True:
+        lookback_period = int(rng.integers(40, 121))
+        initial_end = int(rng.integers(10, lookback_period + 1))
+        params = dict(
+            DEFAULT_PARAMS,
+            threshold=round(float(rng.uniform(1.0, 3.0)), 2),
+            lookback_period=lookback_period,
+            initial_start=max(0, initial_end - int(rng.integers(5, 31))),
+            initial_end=initial_end,
+            lot_size_1=int(rng.integers(1, 11)) * 1000,
+            lot_size_2=int(rng.integers(1, 11)) * 1000,
+            stop_loss=-int(rng.integers(1, 41)) * 500,
+            take_profit=int(rng.integers(1, 101)) * 500,
+            hedge_ratio_mode=str(rng.choice(HEDGE_RATIO_MODES)),
+            coint_retest_interval=int(rng.choice([1, 1, 5, 10, 20])),
+            coint_drift_monitor=str(rng.choice(DRIFT_MONITORS)),
+            resolution=str(rng.choice(BAR_RESOLUTIONS, p=[0.6, 0.3, 0.1]))
+        )
+        if validate_params(params)[0]:
+            return params
+
+def load_case_data(data):
+
+    if data['source'] == 'synthetic':
+        prices1, prices2 = generate_synthetic_pairs(1, data['n_bars'], seed=data['seed'])
+        df1 = prices1.rename(columns={prices1.columns[0]: 'Close'})
+        df2 = prices2.rename(columns={prices2.columns[0]: 'Close'})
+    elif data['source'] == 'real':
+        df1, df2 = read_price_data()
+    else:
+        raise ValueError(f"Unsupported data source: {data['source']}")
+
+    # Histories are generated at full length and then cut, so a shorter case keeps the same prices
+    end = data.get('end') or len(df1)
+    return df1.iloc[:end], df2.iloc[:end]
+
+def compare_trade_logs(reference, candidate, rtol=RTOL, atol=ATOL):
+
+    if reference is None or candidate is None:
+        if reference is None and candidate is None:
+            return []
+        return [{'column': 'Result', 'rows': 1, 'first_date': None,
+                 'reference': None if reference is None else "trade log",
+                 'candidate': None if candidate is None else "trade log"}]
+
+    if not reference.index.equals(candidate.index):
+        return [{'column': 'Date', 'rows': abs(len(reference) - len(candidate)) or 1, 'first_date': None,
+                 'reference': len(reference), 'candidate': len(candidate)}]
+
+    mismatches = []
+    for column in COMPARED_COLUMNS:
+        expected = reference[column]
+        actual = candidate[column]
+        if column in NUMERIC_COLUMNS:
+            differs = ~np.isclose(expected.to_numpy(dtype=float), actual.to_numpy(dtype=float),
+                                  rtol=rtol, atol=atol, equal_nan=True)
+        else:
+            differs = expected.astype(str).to_numpy() != actual.astype(str).to_numpy()
+
+        if differs.any():
+            first = int(np.argmax(differs))
+            mismatches.append({
+                'column': column,
+                'rows': int(differs.sum()),
+                'first_date': str(reference.index[first].date()),
+                'reference': expected.iloc[first].item() if hasattr(expected.iloc[first], 'item') else str(expected.iloc[first]),
+                'candidate': actual.iloc[first].item() if hasattr(actual.iloc[first], 'item') else str(actual.iloc[first])
+            })
+
+    return mismatches
+
+def run_case(case, engine, rtol=RTOL, atol=ATOL):
+
+    df1, df2 = load_case_data(case['data'])
+
+    start = time.perf_counter()
+    reference = run_strategy(dict(case['params']), df1, df2, save_results=False)
+    reference_runtime = time.perf_counter() - start
+
+    start = time.perf_counter()
+    candidate = ENGINES[engine](dict(case['params']), df1, df2)
+    candidate_runtime = time.perf_counter() - start
+
+    return compare_trade_logs(reference, candidate, rtol, atol), reference_runtime, candidate_runtime
+
+def minimize_case(case, engine, rtol=RTOL, atol=ATOL):
+    """Shrink a failing case while it keeps failing.
+
+    Parameters are first reset to their defaults one at a time, then the price
+    history is cut just after the first mismatching bar and halved towards the
+    shortest history the windows allow. A step is only kept when a trade log
+    column that failed originally still fails.
+    """
+
+    case = json.loads(json.dumps(case))
+    failing_columns = {m['column'] for m in run_case(case, engine, rtol, atol)[0]}
+
+    def fails(candidate_case):
+        return any(m['column'] in failing_columns for m in run_case(candidate_case, engine, rtol, atol)[0])
+
+    for name, default in DEFAULT_PARAMS.items():
+        if case['params'].get(name) == default:
+            continue
+        trial = dict(case, params=dict(case['params'], **{name: default}))
+        if validate_params(trial['params'])[0] and fails(trial):
+            case = trial
+
+    df1, _ = load_case_data(case['data'])
+    n_bars = len(df1)
+    min_bars = max(case['params']['lookback_period'], case['params']['initial_end']) + 1
+
+    # The bars after the first mismatch cannot be needed to reproduce it
+    mismatches = run_case(case, engine, rtol, atol)[0]
+    first_dates = [pd.Timestamp(m['first_date']) for m in mismatches if m['first_date']]
+    if first_dates:
+        cut = int(df1.index.searchsorted(min(first_dates), side='right'))
+        trial = dict(case, data=dict(case['data'], end=max(cut, min_bars)))
+        if trial['data']['end'] < n_bars and fails(trial):
+            case, n_bars = trial, trial['data']['end']
+
+    step = (n_bars - min_bars) // 2
+    while step > 0:
+        trial = dict(case, data=dict(case['data'], end=n_bars - step))
+        if fails(trial):
+            case, n_bars = trial, n_bars - step
+        else:
+            step //= 2
+
+    return case
+
+def write_fixture(case, engine, mismatches, fixture_dir=FIXTURE_DIR, rtol=RTOL, atol=ATOL):
+
+    fixture = {'engine': engine, 'rtol': rtol, 'atol': atol, **case, 'mismatches': mismatches}
+    case_key = json.dumps({'engine': engine, **case}, sort_keys=True).encode()
+
+    fixture_dir = Path(fixture_dir)
+    fixture_dir.mkdir(parents=True, exist_ok=True)
+    path = fixture_dir / f"{engine}-{hashlib.sha1(case_key).hexdigest()[:12]}.json"
+    path.write_text(json.dumps(fixture, indent=2) + "\n")
+
+    return path
+
+def run_differential(engine, n_cases=25, seed=0, source='synthetic', n_bars=750, fixture_dir=FIXTURE_DIR,
+                     rtol=RTOL, atol=ATOL, minimize=True):
+
+    rng = np.random.default_rng(seed)
+    rows = []
+
+    print(f"{'Case':>4} {'Resolution':<10} {'Mode':<10} {'Bars':>5} {'Reference (s)':>14} "
+          f"{'Engine (s)':>11} {'Speedup':>8}  Result")
+    for case_idx in range(n_cases):
+        if source == 'synthetic':
+            data = {'source': source, 'seed': int(rng.integers(2**31)), 'n_bars': n_bars}
+        else:
+            data = {'source': source, 'end': n_bars}
+        case = {'params': random_params(rng), 'data': data}
+
+        mismatches, reference_runtime, candidate_runtime = run_case(case, engine, rtol, atol)
+        speedup = reference_runtime / candidate_runtime if candidate_runtime > 0 else np.inf
+
+        result = "ok"
+        if mismatches:
+            failing = minimize_case(case, engine, rtol, atol) if minimize else case
+            path = write_fixture(failing, engine, run_case(failing, engine, rtol, atol)[0], fixture_dir, rtol, atol)
+            result = f"FAIL {', '.join(m['column'] for m in mismatches)} -> {path}"
+
+        rows.append({'Reference': reference_runtime, 'Engine': candidate_runtime, 'Failed': bool(mismatches)})
+        print(f"{case_idx:>4} {case['params']['resolution']:<10} {case['params']['hedge_ratio_mode']:<10} "
+              f"{len(load_case_data(data)[0]):>5} {reference_runtime:>14.3f} {candidate_runtime:>11.3f} "
+              f"{speedup:>7.1f}x  {result}")
+
+    summary = pd.DataFrame(rows)
+    total_reference = summary['Reference'].sum()
+    total_engine = summary['Engine'].sum()
+    print(f"\n{engine}: {len(summary) - summary['Failed'].sum()}/{len(summary)} cases match, "
+          f"total speedup {total_reference / total_engine:.1f}x "
+          f"(median {(summary['Reference'] / summary['Engine']).median():.1f}x)")
+
+    return summary
+
+def replay_fixture(path):
+
+    fixture = json.loads(Path(path).read_text())
+    case = {'params': fixture['params'], 'data': fixture['data']}
+    mismatches = run_case(case, fixture['engine'], fixture['rtol'], fixture['atol'])[0]
+
+    return mismatches
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Differential check of alternative engines against run_strategy")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help="Compare an engine on random parameter sets")
+    run_parser.add_argument('--engine', choices=list(ENGINES), default='portfolio', help="Engine to compare")
+    run_parser.add_argument('--cases', type=int, default=25, help="Number of random cases")
+    run_parser.add_argument('--seed', type=int, default=0, help="Seed for parameters and synthetic data")
+    run_parser.add_argument('--data', choices=['synthetic', 'real'], default='synthetic', help="Price data source")
+    run_parser.add_argument('--bars', type=int, default=750, help="Bars per case (real data is cut to this)")
+    run_parser.add_argument('--fixtures', default=str(FIXTURE_DIR), help="Directory for failing-case fixtures")
+    run_parser.add_argument('--rtol', type=float, default=RTOL, help="Relative tolerance for numeric columns")
+    run_parser.add_argument('--atol', type=float, default=ATOL, help="Absolute tolerance for numeric columns")
+    run_parser.add_argument('--no-minimize', action='store_true', help="Write failing cases without minimizing them")
+
+    replay_parser = subparsers.add_parser('replay', help="Re-run regression fixtures")
+    replay_parser.add_argument('fixtures', nargs='+', help="Fixture JSON files")
+
+    args = parser.parse_args()
+
+    # Per-bar strategy logging would dominate the timings
+    logging.basicConfig(level=logging.ERROR)
+    warnings.simplefilter('ignore')
+
+    if args.command == 'run':
+        summary = run_differential(args.engine, args.cases, args.seed, args.data, args.bars, args.fixtures,
+                                   args.rtol, args.atol, not args.no_minimize)
+        raise SystemExit(int(summary['Failed'].any()))
+
+    failed = 0
+    for path in args.fixtures:
+        mismatches = replay_fixture(path)
+        failed += bool(mismatches)
+        print(f"{path}: {'FAIL ' + ', '.join(m['column'] for m in mismatches) if mismatches else 'ok'}")
+    raise SystemExit(int(failed > 0))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import numpy as np
+
+
+class KalmanHedgeRatio:
+    """Streaming Kalman-filter estimate of the hedge ratio between two assets.
+
+    Models log(asset 1) as ``beta * log(asset 2) + alpha`` with ``beta`` and
+    ``alpha`` following a random walk, so the plain log price ratio is the
+    special case ``beta = 1, alpha = 0``. Each call to ``update`` costs O(1)
+    and returns the z-score of the new spread observation, i.e. the forecast
+    error divided by its predicted standard deviation.
+
+    The measurement noise of the spread is estimated online from the
+    post-update residuals ``r``: ``r**2 + h' P h`` has the noise variance as
+    its expectation, so its running average (exponential with weight
+    ``noise_decay`` once ``1 / noise_decay`` bars are in) keeps the z-score
+    near unit variance at any price scale or bar resolution.
+    ``observation_var`` is only the prior used for the first bars.
+
+    Prices may be scalars (a single pair) or 1-D arrays with one entry per
+    pair, in which case every pair is updated in the same vectorized step.
+    """
+
+    def __init__(self, delta=1e-6, observation_var=1e-4, noise_decay=0.05, n_pairs=1):
+
+        # State noise relative to the state estimate and measurement noise of the spread, one per pair
+        self.state_var = delta / (1 - delta)
+        self.observation_var = np.full(n_pairs, observation_var, dtype=float)
+        self.noise_decay = noise_decay
+        self.n_updates = 0
+
+        # State vector [beta, alpha] and its covariance, one per pair
+        self.theta = np.zeros((n_pairs, 2))
+        self.theta[:, 0] = 1.0
+        self.P = np.tile(np.eye(2), (n_pairs, 1, 1))
+
+        # Latest spread forecast error and its variance
+        self.spread = np.zeros(n_pairs)
+        self.spread_var = self.observation_var.copy()
+
+    @property
+    def hedge_ratio(self):
+        return self.theta[:, 0]
+
+    @property
+    def intercept(self):
+        return self.theta[:, 1]
+
+    def update(self, price1, price2):
+
+        scalar = np.ndim(price1) == 0
+        y = np.log(np.atleast_1d(np.asarray(price1, dtype=float)))
+        h = np.stack([np.log(np.atleast_1d(np.asarray(price2, dtype=float))), np.ones_like(y)], axis=-1)
+
+        # Predict: random-walk state, so only the covariance grows
+        R = self.P + self.state_var * np.eye(2)
+
+        # Spread forecast error and its variance
+        e = y - np.einsum('ni,ni->n', h, self.theta)
+        Rh = np.einsum('nij,nj->ni', R, h)
+        hRh = np.einsum('ni,ni->n', h, Rh)
+        Q = hRh + self.observation_var
+
+        # Update state estimate with the Kalman gain
+        K = Rh / Q[:, None]
+        self.theta = self.theta + K * e[:, None]
+        self.P = R - K[:, :, None] * Rh[:, None, :]
+
+        # Re-estimate the measurement noise from the residual r = e * V / Q and h' P h = hRh * V / Q
+        # of the updated state, after the forecast so the z-score stays out of sample
+        shrink = self.observation_var / Q
+        self.n_updates += 1
+        weight = max(self.noise_decay, 1 / self.n_updates)
+        self.observation_var = (1 - weight) * self.observation_var + weight * ((e * shrink) ** 2 + hRh * shrink)
+
+        self.spread = e
+        self.spread_var = Q
+
+        zscore = e / np.sqrt(Q)
+
+        return zscore[0] if scalar else zscore
+
+    def warm_up(self, prices1, prices2):
+
+        # Feed a block of history through the filter, one bar at a time
+        for p1, p2 in zip(prices1, prices2):
+            self.update(p1, p2)
+
+        return self
@@ -0,0 +1,275 @@
+import numpy as np
+import pandas as pd
+import logging
+from numpy.lib.stride_tricks import sliding_window_view
+
+from src.cointegration import rolling_cointegration
+from src.diagnostics import DiagnosticsLog
+from src.kalman import KalmanHedgeRatio
+from src.scheduling import carry_forward, kalman_overrides, kalman_schedule, retest_bars
+from src.trader import (
+    NO_STATUS, STATUS_BUY, STATUS_CB, STATUS_HOLD, STATUS_LABELS, STATUS_SELL, STATUS_SL, STATUS_TP,
+    cointegration_test
+)
+from src.user_inputs import DEFAULT_PARAMS, validate_params
+
+
+COINT_METHODS = ["batched", "reference"]
+
+
+def portfolio_cointegration(prices1, prices2, lookback_period, first_idx, retest_interval=1, drift_monitor="None",
+                            scores=None, coint_method="batched", log=None):
+
+    if coint_method not in COINT_METHODS:
+        raise ValueError(f"Unknown cointegration method: {coint_method}")
+
+    n_bars, n_pairs = prices1.shape
+
+    # The schedule does not depend on test results, so the bars to test are known up front, in one vectorized
+    # step per bar across pairs; optional (trading bar x pair) drift scores stand in for the static residual score
+    retest = retest_bars((n_bars, n_pairs), first_idx, retest_interval, drift_monitor, scores, prices1, prices2,
+                         lookback_period)
+
+    # Batched tests give every bar's verdict at once, identical to cointegration_test; the reference
+    # calls cointegration_test itself on the scheduled bars only
+    if coint_method == "batched":
+        verdicts = rolling_cointegration(prices1, prices2, lookback_period, first_idx, maxlag=None, autolag="AIC")
+    else:
+        verdicts = np.zeros((n_bars, n_pairs), dtype=bool)
+        for j in range(n_pairs):
+            df1 = pd.DataFrame({'Close': prices1[:, j]})
+            df2 = pd.DataFrame({'Close': prices2[:, j]})
+            for current_idx in np.flatnonzero(retest[:, j]):
+                verdicts[current_idx, j] = cointegration_test(df1, df2, lookback_period, current_idx, log)[1]
+
+    return carry_forward(verdicts, retest)
+
+def rolling_zscores(prices1, prices2, initial_start, initial_end):
+
+    # Log price ratio spread, scored against the trailing window that precedes each bar
+    spread = np.log(prices1 / prices2)
+    window = initial_end - initial_start
+    windows = sliding_window_view(spread[:-1], window, axis=0)[initial_end - window:]
+
+    mean_spread = windows.mean(axis=-1)
+    std_spread = windows.std(axis=-1)
+    current_spread = spread[initial_end:]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        zscores = np.where(std_spread > 0, (current_spread - mean_spread) / std_spread, 0.0)
+
+    return zscores
+
+def kalman_zscores(prices1, prices2, initial_end):
+
+    kalman = KalmanHedgeRatio(n_pairs=prices1.shape[1]).warm_up(prices1[:initial_end], prices2[:initial_end])
+
+    return np.array([kalman.update(p1, p2) for p1, p2 in zip(prices1[initial_end:], prices2[initial_end:])])
+
+def run_portfolio(prices1, prices2, params=None, lot_size_1=None, lot_size_2=None, capital=None,
+                  max_leverage=1.0, is_cointegrated=None, coint_method="batched", log=None):
+    """Run the pairs strategy on many pairs at once.
+
+    ``prices1`` and ``prices2`` are (time x pair) frames of close prices with
+    matching dates and pair columns. Each bar is one vectorized step across all
+    pairs, following the same signal, SL/TP/CB and pricing rules as
+    ``run_strategy``.
+
+    When ``capital`` is given, new entries share a gross exposure limit of
+    ``capital * max_leverage``. Entries are admitted by descending absolute
+    z-score until the limit is reached and the rest stay in HOLD. Lot sizes
+    default to the params and may be scalars or one value per pair.
+    ``is_cointegrated`` optionally supplies a precomputed (time x pair)
+    verdict; otherwise every pair is tested on the same schedule as in
+    ``run_strategy``. By default (``coint_method="batched"``) the rolling
+    Engle-Granger tests of all pairs are solved together by
+    ``rolling_cointegration`` with the same AIC lag selection as ``adfuller``,
+    so the verdicts are identical; ``coint_method="reference"`` calls
+    ``cointegration_test`` per pair and bar instead. Diagnostics of the run go
+    to ``log``, or to a new ``DiagnosticsLog`` when none is given.
+
+    Returns a dict of (time x pair) frames for the per-pair trade log fields,
+    plus 'Equity' (the aggregate curve), 'Attribution' (per-pair summary) and
+    'Diagnostics' (the run's log).
+    """
+
+    params = dict(DEFAULT_PARAMS, **(params or {}))
+
+    # Validate parameters
+    is_valid, error_message = validate_params(params)
+    if not is_valid:
+        logging.error(f"Parameter validation failed: {error_message}")
+        return None
+
+    if prices1.shape != prices2.shape or not prices1.index.equals(prices2.index):
+        logging.error("Asset price panels must share the same dates and pairs")
+        return None
+
+    threshold = params['threshold']
+    lookback_period = params['lookback_period']
+    initial_start = params['initial_start']
+    initial_end = params['initial_end']
+    stop_loss = params['stop_loss']
+    take_profit = params['take_profit']
+
+    dates = prices1.index
+    pairs = prices1.columns
+    p1 = prices1.to_numpy(dtype=float)
+    p2 = prices2.to_numpy(dtype=float)
+    n_bars, n_pairs = p1.shape
+
+    if n_bars < lookback_period or n_bars <= initial_end:
+        logging.error(f"Lookback period {lookback_period} exceeds available data")
+        return None
+
+    lots1 = np.broadcast_to(np.asarray(params['lot_size_1'] if lot_size_1 is None else lot_size_1, dtype=float), n_pairs)
+    lots2 = np.broadcast_to(np.asarray(params['lot_size_2'] if lot_size_2 is None else lot_size_2, dtype=float), n_pairs)
+    gross_limit = np.inf if capital is None else capital * max_leverage
+
+    # Each run reports into its own diagnostics log
+    log = log if log is not None else DiagnosticsLog(logging.getLogger(__name__))
+    log.configure(debug=params['debug_diagnostics'])
+    log.reset()
+
+    # Z-scores and cointegration verdicts for every trading bar and pair
+    retest_interval = params['coint_retest_interval']
+    drift_monitor = params['coint_drift_monitor']
+    drift_scores = None
+    if params['hedge_ratio_mode'] == "Kalman":
+        zscores = kalman_zscores(p1, p2, initial_end)
+        overridden = kalman_overrides(retest_interval, drift_monitor)
+        retest_interval, drift_monitor = kalman_schedule(retest_interval, drift_monitor)
+        if overridden:
+            logging.warning(f"{', '.join(overridden)} overridden in Kalman mode: re-testing every "
+                            f"{retest_interval} bars with the {drift_monitor} drift monitor")
+        drift_scores = zscores
+    else:
+        zscores = rolling_zscores(p1, p2, initial_start, initial_end)
+
+    if is_cointegrated is None:
+        is_cointegrated = portfolio_cointegration(
+            p1, p2, lookback_period, initial_end, retest_interval, drift_monitor, drift_scores, coint_method, log
+        )
+    is_cointegrated = np.asarray(is_cointegrated, dtype=bool)[initial_end:]
+
+    # Signals do not depend on position state, so they are computed for all bars up front
+    signal_value = np.where(is_cointegrated, np.where(zscores > threshold, -1, np.where(zscores < -threshold, 1, 0)), 0)
+    signal = np.where(signal_value == 1, STATUS_BUY, np.where(signal_value == -1, STATUS_SELL, STATUS_HOLD))
+
+    n_steps = n_bars - initial_end
+    status_log = np.empty((n_steps, n_pairs), dtype=np.int8)
+    buy_log = np.empty((n_steps, n_pairs))
+    sell_log = np.empty((n_steps, n_pairs))
+    mtm_log = np.empty((n_steps, n_pairs))
+    pnl_log = np.empty((n_steps, n_pairs))
+    unrealized = np.empty(n_steps)
+    gross_exposure = np.empty(n_steps)
+
+    prev_status = np.full(n_pairs, NO_STATUS, dtype=np.int8)
+    prev_buy = np.full(n_pairs, np.nan)
+    prev_sell = np.full(n_pairs, np.nan)
+    pnl = np.zeros(n_pairs)
+    open_mtm = np.zeros(n_pairs)
+    entries = np.zeros(n_pairs, dtype=int)
+    rejected = np.zeros(n_pairs, dtype=int)
+
+    for step in range(n_steps):
+        price1 = p1[initial_end + step]
+        price2 = p2[initial_end + step]
+        step_signal = signal[step]
+
+        # MTM of positions carried into this bar
+        was_long = prev_status == STATUS_BUY
+        was_short = prev_status == STATUS_SELL
+        was_open = was_long | was_short
+        mtm = np.where(
+            was_long, (prev_sell - price2) * lots2 + (price1 - prev_buy) * lots1,
+            np.where(was_short, (prev_sell - price1) * lots1 + (price2 - prev_buy) * lots2, np.nan)
+        )
+
+        # Open positions exit on cointegration break, stop loss or take profit; flat pairs follow the signal
+        status = np.where(
+            was_open,
+            np.where(~is_cointegrated[step], STATUS_CB,
+                     np.where(mtm < stop_loss, STATUS_SL, np.where(mtm > take_profit, STATUS_TP, prev_status))),
+            step_signal
+        ).astype(np.int8)
+
+        # Admit new entries by signal strength while the shared gross exposure limit allows
+        notional = price1 * lots1 + price2 * lots2
+        still_open = was_open & (status == prev_status)
+        new_entry = ~was_open & ((status == STATUS_BUY) | (status == STATUS_SELL))
+        if np.isfinite(gross_limit) and new_entry.any():
+            candidates = np.flatnonzero(new_entry)
+            candidates = candidates[np.argsort(-np.abs(zscores[step, candidates]), kind='stable')]
+            available = gross_limit - notional[still_open].sum()
+            admitted = np.cumsum(notional[candidates]) <= available
+            blocked = candidates[~admitted]
+            status[blocked] = STATUS_HOLD
+            new_entry[blocked] = False
+            rejected[blocked] += 1
+        entries += new_entry
+
+        # Entry prices are set on a status change into a position and carried while it is unchanged
+        unchanged = status == prev_status
+        buy_price = np.where(unchanged, prev_buy, np.where(status == STATUS_BUY, price1, np.where(status == STATUS_SELL, price2, np.nan)))
+        sell_price = np.where(unchanged, prev_sell, np.where(status == STATUS_BUY, price2, np.where(status == STATUS_SELL, price1, np.nan)))
+
+        # Realise MTM on exits
+        closed = (status == STATUS_SL) | (status == STATUS_TP) | (status == STATUS_CB)
+        pnl += np.where(closed & ~np.isnan(mtm), mtm, 0.0)
+
+        status_log[step] = status
+        buy_log[step] = buy_price
+        sell_log[step] = sell_price
+        mtm_log[step] = mtm
+        pnl_log[step] = pnl
+        open_mtm = np.where(still_open, mtm, 0.0)
+        unrealized[step] = open_mtm.sum()
+        gross_exposure[step] = notional[(status == STATUS_BUY) | (status == STATUS_SELL)].sum()
+
+        prev_status = status
+        prev_buy = buy_price
+        prev_sell = sell_price
+
+    trading_dates = dates[initial_end:]
+
+    def panel(values):
+        return pd.DataFrame(values, index=trading_dates, columns=pairs)
+
+    realized = pnl_log.sum(axis=1)
+    equity = pd.DataFrame({
+        'Realized_PnL': realized,
+        'Unrealized_PnL': unrealized,
+        'Equity': (0.0 if capital is None else capital) + realized + unrealized,
+        'Gross_Exposure': gross_exposure,
+        'Open_Positions': np.isin(status_log, (STATUS_BUY, STATUS_SELL)).sum(axis=1)
+    }, index=trading_dates)
+
+    total_realized = pnl.sum()
+    attribution = pd.DataFrame({
+        'Realized_PnL': pnl,
+        'Unrealized_PnL': open_mtm,
+        'Trades': entries,
+        'Rejected_Entries': rejected,
+        'PnL_Share %': pnl / total_realized * 100 if total_realized != 0 else np.zeros(n_pairs)
+    }, index=pairs)
+
+    logging.info(f"Portfolio run completed for {n_pairs} pairs with final realized PnL: {total_realized}")
+    log.summary()
+
+    return {
+        'Z-Score': panel(zscores),
+        'Signal_Value': panel(signal_value),
+        'Status': pd.DataFrame({
+            pair: pd.Categorical.from_codes(status_log[:, j], categories=STATUS_LABELS) for j, pair in enumerate(pairs)
+        }, index=trading_dates),
+        'Buy_Price': panel(buy_log),
+        'Sell_Price': panel(sell_log),
+        'MTM': panel(mtm_log),
+        'PnL': panel(pnl_log),
+        'Is_Cointegrated': panel(is_cointegrated),
+        'Equity': equity,
+        'Attribution': attribution,
+        'Diagnostics': log
+    }
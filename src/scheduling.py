@@ -0,0 +1,256 @@
+import logging
+
+import numpy as np
+
+from src.diagnostics import DiagnosticsLog
+
+DRIFT_MONITORS = ["None", "Variance", "CUSUM"]
+
+# Minimum re-test interval in Kalman mode, where the filter's own forecast error drives the drift monitor
+KALMAN_RETEST_INTERVAL = 20
+
+def _fit_residuals(x, y):
+
+    # Static residual model of (row x window) price stacks: no-constant hedge ratio, residual mean and spread.
+    # Row-wise reductions give the same result for one row as for many, so both schedulers agree exactly
+    hedge_ratio = (x * y).sum(axis=1) / (y * y).sum(axis=1)
+    resid = x - hedge_ratio[:, None] * y
+
+    return hedge_ratio, resid.mean(axis=1), resid.std(axis=1)
+
+class CointegrationScheduler:
+    """Runs the Engle-Granger test only when it is due and carries the verdict forward in between.
+
+    A re-test is due every ``retest_interval`` bars, or earlier when the drift
+    monitor fires. The monitor scores each new bar's residual against the
+    hedge ratio and residual spread of the last test, which costs O(1) per bar:
+
+    - "Variance" tracks an exponentially weighted variance of the scored
+      residuals and fires once it exceeds ``variance_ratio`` times the fitted
+      variance.
+    - "CUSUM" accumulates two-sided CUSUM sums of the scored residuals and
+      fires once either exceeds ``cusum_threshold``.
+
+    Callers that already score each bar, such as the Kalman filter's
+    standardized forecast error, can pass that ``score`` to ``check`` in place
+    of the static residual score.
+
+    ``test`` is the cointegration test to schedule, with the signature and
+    return value of ``cointegration_test``. With ``retest_interval=1`` every
+    bar is tested, which matches calling it directly.
+    """
+
+    def __init__(self, test, retest_interval=1, drift_monitor="None", variance_ratio=2.0, variance_decay=0.2,
+                 cusum_threshold=4.0, cusum_drift=0.5, log=None):
+
+        if retest_interval < 1:
+            raise ValueError(f"Re-test interval must be at least 1, got {retest_interval}")
+        if drift_monitor not in DRIFT_MONITORS:
+            raise ValueError(f"Unknown drift monitor: {drift_monitor}")
+
+        self.test = test
+        self.retest_interval = retest_interval
+        self.drift_monitor = drift_monitor
+        self.variance_ratio = variance_ratio
+        self.variance_decay = variance_decay
+        self.cusum_threshold = cusum_threshold
+        self.cusum_drift = cusum_drift
+        self.log = log if log is not None else DiagnosticsLog(logging.getLogger(__name__))
+
+        # Last verdict and the residual model it was based on
+        self.adf_result = None
+        self.is_cointegrated = None
+        self.bars_since_test = 0
+        self.hedge_ratio = None
+        self.resid_mean = 0.0
+        self.resid_std = 0.0
+
+        # Drift monitor state
+        self.ewm_var = 1.0
+        self.cusum_pos = 0.0
+        self.cusum_neg = 0.0
+
+        # Counters for the end-of-run report
+        self.bars = 0
+        self.scheduled_tests = 0
+        self.triggered_tests = 0
+
+    def check(self, df1, df2, lookback_period, current_idx, score=None):
+
+        self.bars += 1
+
+        if self.is_cointegrated is None or self.bars_since_test + 1 >= self.retest_interval:
+            self.scheduled_tests += 1
+            return self._retest(df1, df2, lookback_period, current_idx)
+
+        if self._drift_detected(df1['Close'].iloc[current_idx], df2['Close'].iloc[current_idx], score):
+            self.log.event("coint.drift_retest", "Drift monitor (%s) triggered cointegration re-test at index %d",
+                           self.drift_monitor, current_idx)
+            self.triggered_tests += 1
+            return self._retest(df1, df2, lookback_period, current_idx)
+
+        self.bars_since_test += 1
+
+        return self.adf_result, self.is_cointegrated
+
+    def report(self):
+
+        tests = self.scheduled_tests + self.triggered_tests
+
+        return {
+            'Bars': self.bars,
+            'ADF Calls': tests,
+            'ADF Calls Saved': self.bars - tests,
+            'Scheduled Tests': self.scheduled_tests,
+            'Triggered Tests': self.triggered_tests
+        }
+
+    def _retest(self, df1, df2, lookback_period, current_idx):
+
+        self.adf_result, self.is_cointegrated = self.test(df1, df2, lookback_period, current_idx)
+        self.bars_since_test = 0
+
+        # Reset the drift monitor and refit the static residual model on the same window
+        self.ewm_var = 1.0
+        self.cusum_pos = 0.0
+        self.cusum_neg = 0.0
+        if self.drift_monitor != "None":
+            start_idx = max(0, current_idx - lookback_period)
+            x = df1['Close'].values[None, start_idx:current_idx]
+            y = df2['Close'].values[None, start_idx:current_idx]
+            (self.hedge_ratio,), (self.resid_mean,), (self.resid_std,) = _fit_residuals(x, y)
+
+        return self.adf_result, self.is_cointegrated
+
+    def _drift_detected(self, price1, price2, score=None):
+
+        if self.drift_monitor == "None":
+            return False
+
+        # Score the new residual against the fitted residual distribution unless the caller scored it
+        if score is None:
+            if self.resid_std == 0:
+                return False
+            score = (price1 - self.hedge_ratio * price2 - self.resid_mean) / self.resid_std
+
+        if self.drift_monitor == "Variance":
+            self.ewm_var = (1 - self.variance_decay) * self.ewm_var + self.variance_decay * score ** 2
+            return self.ewm_var > self.variance_ratio
+
+        self.cusum_pos = max(0.0, self.cusum_pos + score - self.cusum_drift)
+        self.cusum_neg = max(0.0, self.cusum_neg - score - self.cusum_drift)
+        return self.cusum_pos > self.cusum_threshold or self.cusum_neg > self.cusum_threshold
+
+
+def retest_bars(shape, first_idx, retest_interval=1, drift_monitor="None", scores=None, prices1=None, prices2=None,
+                lookback_period=None, variance_ratio=2.0, variance_decay=0.2, cusum_threshold=4.0, cusum_drift=0.5):
+    """Bars on which the ``CointegrationScheduler`` rules run a test, for many pairs at once.
+
+    Returns a (time x pair) boolean array of the given ``shape``. A drift
+    monitor needs either ``scores``, the (trading bar x pair) drift scores from
+    ``first_idx`` on, or the (time x pair) ``prices1`` and ``prices2`` with
+    ``lookback_period``, in which case each pair's static residual model is
+    refitted on the bars where it re-tests, as the scheduler does. Test
+    results never feed back into the schedule, so it is known before any test
+    runs. Each bar is one vectorized step across pairs.
+    """
+
+    static = drift_monitor != "None" and scores is None
+    if static and (prices1 is None or prices2 is None or lookback_period is None):
+        raise ValueError("A drift monitor needs per-bar scores or the prices and lookback period to schedule tests")
+
+    n_bars, n_pairs = shape
+    retest_log = np.zeros((n_bars, n_pairs), dtype=bool)
+
+    bars_since_test = np.zeros(n_pairs, dtype=int)
+    ewm_var = np.ones(n_pairs)
+    cusum_pos = np.zeros(n_pairs)
+    cusum_neg = np.zeros(n_pairs)
+
+    # Static residual model per pair, refitted only for the pairs that re-test
+    if static:
+        prices1 = np.asarray(prices1, dtype=float)
+        prices2 = np.asarray(prices2, dtype=float)
+        hedge_ratio = np.zeros(n_pairs)
+        resid_mean = np.zeros(n_pairs)
+        resid_std = np.zeros(n_pairs)
+
+    for current_idx in range(first_idx, n_bars):
+        due = bars_since_test + 1 >= retest_interval
+        if current_idx == first_idx:
+            due[:] = True
+
+        # Monitors only advance on bars that are not already due for a test, and a static
+        # model with no residual spread does not score
+        triggered = np.zeros(n_pairs, dtype=bool)
+        if drift_monitor != "None":
+            if static:
+                scored = ~due & (resid_std != 0)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    score = (prices1[current_idx] - hedge_ratio * prices2[current_idx] - resid_mean) / resid_std
+                score = np.where(scored, score, 0.0)
+            else:
+                scored = ~due
+                score = scores[current_idx - first_idx]
+            if drift_monitor == "Variance":
+                ewm_var = np.where(scored, (1 - variance_decay) * ewm_var + variance_decay * score ** 2, ewm_var)
+                triggered = scored & (ewm_var > variance_ratio)
+            else:
+                cusum_pos = np.where(scored, np.maximum(0.0, cusum_pos + score - cusum_drift), cusum_pos)
+                cusum_neg = np.where(scored, np.maximum(0.0, cusum_neg - score - cusum_drift), cusum_neg)
+                triggered = scored & ((cusum_pos > cusum_threshold) | (cusum_neg > cusum_threshold))
+
+        retest = due | triggered
+        bars_since_test = np.where(retest, 0, bars_since_test + 1)
+        ewm_var = np.where(retest, 1.0, ewm_var)
+        cusum_pos = np.where(retest, 0.0, cusum_pos)
+        cusum_neg = np.where(retest, 0.0, cusum_neg)
+        retest_log[current_idx] = retest
+
+        if static:
+            rows = np.flatnonzero(retest)
+            start_idx = max(0, current_idx - lookback_period)
+            x = np.ascontiguousarray(prices1[start_idx:current_idx, rows].T)
+            y = np.ascontiguousarray(prices2[start_idx:current_idx, rows].T)
+            hedge_ratio[rows], resid_mean[rows], resid_std[rows] = _fit_residuals(x, y)
+
+    return retest_log
+
+def carry_forward(verdicts, retest):
+
+    # Each bar keeps the verdict of the pair's latest test; bars before the first test are False
+    rows = np.arange(len(retest))[:, None]
+    last_test = np.maximum.accumulate(np.where(retest, rows, -1), axis=0)
+
+    return np.take_along_axis(np.asarray(verdicts, dtype=bool), np.maximum(last_test, 0), axis=0) & (last_test >= 0)
+
+def kalman_schedule(retest_interval, drift_monitor):
+
+    # The filter scores every bar for free, so Kalman mode re-tests sparsely and lets drift trigger the rest
+    return max(retest_interval, KALMAN_RETEST_INTERVAL), "Variance" if drift_monitor == "None" else drift_monitor
+
+def kalman_overrides(retest_interval, drift_monitor) -> list[str]:
+
+    # Inputs that kalman_schedule replaces, so callers can warn that they have no effect
+    overridden = []
+    if retest_interval < KALMAN_RETEST_INTERVAL:
+        overridden.append("Cointegration Re-test Interval")
+    if drift_monitor == "None":
+        overridden.append("Drift Monitor")
+
+    return overridden
+
+def compare_verdicts(reference, scheduled):
+
+    reference = np.asarray(reference, dtype=bool)
+    scheduled = np.asarray(scheduled, dtype=bool)
+
+    # Count status flips in each series and the bars where they disagree
+    reference_flips = int(np.count_nonzero(reference[1:] != reference[:-1]))
+    scheduled_flips = int(np.count_nonzero(scheduled[1:] != scheduled[:-1]))
+
+    return {
+        'Reference Flips': reference_flips,
+        'Scheduled Flips': scheduled_flips,
+        'Mismatched Bars': int(np.count_nonzero(reference != scheduled))
+    }
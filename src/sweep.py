@@ -0,0 +1,373 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import sqlite3
+import time
+import warnings
+from math import prod
+
+from src.charts import calculate_performance_metrics
+from src.data import read_price_data
+from src.trader import run_strategy
+from src.user_inputs import DEFAULT_PARAMS, validate_params
+
+# Scope: the queue serves worker processes on one host. SQLite needs reliable file locks and, in WAL
+# mode, shared memory, which network filesystems do not provide, so workers on other machines are
+# deliberately not supported and a dead worker is always a local process that no longer exists
+
+# Full grid over the sidebar ranges of the eight strategy parameters
+SWEEP_GRID = {
+    'threshold': [round(1.0 + 0.25 * i, 2) for i in range(9)],
+    'lookback_period': list(range(40, 121, 10)),
+    'initial_start': list(range(0, 101, 10)),
+    'initial_end': list(range(10, 111, 10)),
+    'lot_size_1': list(range(1000, 10001, 1000)),
+    'lot_size_2': list(range(1000, 10001, 1000)),
+    'stop_loss': list(range(-20000, 0, 2500)),
+    'take_profit': list(range(2500, 50001, 2500))
+}
+
+# A claimed shard whose worker has not checkpointed for this long is handed to another worker
+LEASE_SECONDS = 600
+
+# How often an idle worker checks whether a shard claimed by another worker has become free
+POLL_SECONDS = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS shards (
+    shard_id INTEGER PRIMARY KEY,
+    start_idx INTEGER NOT NULL,
+    stop_idx INTEGER NOT NULL,
+    checkpoint_idx INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    heartbeat REAL,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS shards_status ON shards (status);
+CREATE TABLE IF NOT EXISTS results (
+    combo_idx INTEGER PRIMARY KEY,
+    shard_id INTEGER NOT NULL,
+    params TEXT NOT NULL,
+    total_return REAL,
+    max_drawdown REAL,
+    sharpe_ratio REAL,
+    trades INTEGER,
+    win_rate REAL,
+    runtime REAL
+);
+"""
+
+
+def connect(db_path):
+
+    # WAL lets readers (status checks) run alongside the writing workers. It relies on shared
+    # memory, so every worker must run on the host that holds the file, never over a network filesystem
+    conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+def grid_size(grid):
+    return prod(len(values) for values in grid.values())
+
+def decode_combo(grid, combo_idx):
+
+    # Mixed-radix decode, so the grid never has to be materialised
+    params = {}
+    for name in reversed(list(grid)):
+        values = grid[name]
+        combo_idx, position = divmod(combo_idx, len(values))
+        params[name] = values[position]
+
+    return {name: params[name] for name in grid}
+
+def init_sweep(db_path, grid=None, shard_size=1000):
+
+    grid = grid or SWEEP_GRID
+    total = grid_size(grid)
+
+    conn = connect(db_path)
+    try:
+        conn.executescript(SCHEMA)
+
+        # Re-initialising an existing queue would silently change what combo indices mean
+        existing = conn.execute("SELECT value FROM meta WHERE key = 'grid'").fetchone()
+        if existing is not None:
+            if json.loads(existing[0]) != grid:
+                raise ValueError(f"Sweep database {db_path} already holds a different grid")
+            logging.info(f"Sweep database {db_path} already initialised, resuming")
+            return total
+
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("INSERT INTO meta (key, value) VALUES ('grid', ?)", (json.dumps(grid),))
+        conn.execute("INSERT INTO meta (key, value) VALUES ('shard_size', ?)", (str(shard_size),))
+        conn.executemany(
+            "INSERT INTO shards (start_idx, stop_idx, checkpoint_idx) VALUES (?, ?, ?)",
+            ((start, min(start + shard_size, total), start) for start in range(0, total, shard_size))
+        )
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+    logging.info(f"Initialised sweep of {total} combinations in shards of {shard_size}")
+    return total
+
+def load_grid(conn):
+    return json.loads(conn.execute("SELECT value FROM meta WHERE key = 'grid'").fetchone()[0])
+
+def claim_shard(conn, worker_id, lease_seconds=LEASE_SECONDS):
+
+    now = time.time()
+
+    # BEGIN IMMEDIATE takes the write lock, so two workers can never claim the same shard
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute(
+            "SELECT shard_id, checkpoint_idx, stop_idx FROM shards "
+            "WHERE status = 'pending' OR (status = 'claimed' AND heartbeat < ?) "
+            "ORDER BY shard_id LIMIT 1",
+            (now - lease_seconds,)
+        ).fetchone()
+
+        if row is not None:
+            conn.execute(
+                "UPDATE shards SET status = 'claimed', worker = ?, heartbeat = ?, attempts = attempts + 1 "
+                "WHERE shard_id = ?",
+                (worker_id, now, row[0])
+            )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+    return row
+
+def has_claimed_shards(conn):
+    return conn.execute("SELECT 1 FROM shards WHERE status = 'claimed' LIMIT 1").fetchone() is not None
+
+def worker_alive(worker_id):
+
+    # Worker ids are host:pid, and every worker is a process on this host
+    pid = int(worker_id.rpartition(':')[2])
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+
+    return True
+
+def release_dead_claims(conn):
+
+    # Shards claimed by crashed local workers go back to pending without waiting for the lease
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        claims = conn.execute("SELECT shard_id, worker FROM shards WHERE status = 'claimed'").fetchall()
+        dead = [(shard_id,) for shard_id, worker in claims if not worker_alive(worker)]
+        conn.executemany("UPDATE shards SET status = 'pending', worker = NULL WHERE shard_id = ?", dead)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+    if dead:
+        logging.info(f"Released {len(dead)} shards claimed by workers that are no longer running")
+    return len(dead)
+
+def evaluate_combo(params, df1, df2):
+
+    start = time.perf_counter()
+    results = run_strategy(params, df1, df2, save_results=False)
+    runtime = time.perf_counter() - start
+
+    metrics = calculate_performance_metrics(results)
+    if metrics is None:
+        return None
+
+    return (
+        float(metrics['Total Return']),
+        float(metrics['Max Drawdown']),
+        float(metrics['Sharpe Ratio']),
+        int(metrics['Number of Trades']),
+        float(metrics['Win Rate %']),
+        runtime
+    )
+
+def write_checkpoint(conn, shard_id, worker_id, checkpoint_idx, rows, done=False):
+
+    # Results and shard progress are committed together, so a crash never loses or repeats a combo
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        updated = conn.execute(
+            "UPDATE shards SET checkpoint_idx = ?, heartbeat = ?, status = ? WHERE shard_id = ? AND worker = ?",
+            (checkpoint_idx, time.time(), 'done' if done else 'claimed', shard_id, worker_id)
+        ).rowcount
+        if updated == 0:
+            # The lease expired and another worker took the shard over
+            conn.execute("ROLLBACK")
+            return False
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+    return True
+
+def process_shard(conn, grid, shard, worker_id, df1, df2, checkpoint_every):
+
+    shard_id, checkpoint_idx, stop_idx = shard
+    rows = []
+
+    for combo_idx in range(checkpoint_idx, stop_idx):
+        params = dict(DEFAULT_PARAMS, **decode_combo(grid, combo_idx))
+
+        # Most of the raw grid breaks the window constraints and is skipped without a result row
+        is_valid, _ = validate_params(params)
+        if is_valid:
+            evaluation = evaluate_combo(params, df1, df2)
+            if evaluation is not None:
+                rows.append((combo_idx, shard_id, json.dumps(params)) + evaluation)
+
+        if len(rows) >= checkpoint_every:
+            if not write_checkpoint(conn, shard_id, worker_id, combo_idx + 1, rows):
+                logging.warning(f"Worker {worker_id} lost shard {shard_id}, abandoning it")
+                return False
+            rows = []
+
+    return write_checkpoint(conn, shard_id, worker_id, stop_idx, rows, done=True)
+
+def run_worker(db_path, checkpoint_every=20, lease_seconds=LEASE_SECONDS, max_shards=None, reclaim=False,
+               poll_seconds=POLL_SECONDS):
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+    # Per-bar strategy logging would flood the worker output
+    root_logger = logging.getLogger()
+    log_level = root_logger.level
+    root_logger.setLevel(logging.ERROR)
+    warnings.simplefilter('ignore')
+
+    df1, df2 = read_price_data()
+
+    conn = connect(db_path)
+    completed = 0
+    try:
+        grid = load_grid(conn)
+        if reclaim:
+            release_dead_claims(conn)
+        while max_shards is None or completed < max_shards:
+            shard = claim_shard(conn, worker_id, lease_seconds)
+            if shard is None:
+                # Claimed shards may still come back, either finished or through an expired lease
+                if not has_claimed_shards(conn):
+                    break
+                time.sleep(min(poll_seconds, lease_seconds))
+                continue
+            if process_shard(conn, grid, shard, worker_id, df1, df2, checkpoint_every):
+                completed += 1
+    finally:
+        conn.close()
+        root_logger.setLevel(log_level)
+
+    logging.info(f"Worker {worker_id} finished after {completed} shards")
+    return completed
+
+def run_local(db_path, n_workers=None, checkpoint_every=20, lease_seconds=LEASE_SECONDS, reclaim=False):
+
+    n_workers = n_workers or os.cpu_count() or 1
+
+    if reclaim:
+        conn = connect(db_path)
+        try:
+            release_dead_claims(conn)
+        finally:
+            conn.close()
+
+    # Each process opens its own connection and claims shards independently
+    processes = [
+        multiprocessing.Process(
+            target=run_worker,
+            args=(db_path,),
+            kwargs={'checkpoint_every': checkpoint_every, 'lease_seconds': lease_seconds}
+        )
+        for _ in range(n_workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+def sweep_status(db_path):
+
+    conn = connect(db_path)
+    try:
+        counts = dict(conn.execute("SELECT status, COUNT(*) FROM shards GROUP BY status").fetchall())
+        total, checkpointed = conn.execute(
+            "SELECT SUM(stop_idx - start_idx), SUM(checkpoint_idx - start_idx) FROM shards"
+        ).fetchone()
+        results = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+    finally:
+        conn.close()
+
+    return {
+        'Pending Shards': counts.get('pending', 0),
+        'Claimed Shards': counts.get('claimed', 0),
+        'Done Shards': counts.get('done', 0),
+        'Combinations': total or 0,
+        'Combinations Processed': checkpointed or 0,
+        'Results': results
+    }
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Sharded, resumable parameter sweep backed by a SQLite job queue")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    init_parser = subparsers.add_parser('init', help="Create the job queue for a grid")
+    init_parser.add_argument('db', help="Path to the sweep database")
+    init_parser.add_argument('--grid', help="JSON file mapping parameter names to value lists (defaults to the full grid)")
+    init_parser.add_argument('--shard-size', type=int, default=1000, help="Combinations per shard")
+
+    work_parser = subparsers.add_parser('work', help="Claim and process shards until the queue is empty")
+    work_parser.add_argument('db', help="Path to the sweep database")
+    work_parser.add_argument('--workers', type=int, default=1, help="Number of local worker processes")
+    work_parser.add_argument('--checkpoint-every', type=int, default=20, help="Results per checkpoint commit")
+    work_parser.add_argument('--lease', type=float, default=LEASE_SECONDS,
+                             help="Seconds without a checkpoint after which a claimed shard is reclaimed")
+    work_parser.add_argument('--reclaim', action='store_true',
+                             help="Release shards claimed by local workers that are no longer running before starting")
+
+    status_parser = subparsers.add_parser('status', help="Show sweep progress")
+    status_parser.add_argument('db', help="Path to the sweep database")
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.command == 'init':
+        grid = None
+        if args.grid:
+            with open(args.grid) as f:
+                grid = json.load(f)
+        init_sweep(args.db, grid, args.shard_size)
+    elif args.command == 'work':
+        if args.workers > 1:
+            run_local(args.db, args.workers, args.checkpoint_every, args.lease, args.reclaim)
+        else:
+            run_worker(args.db, checkpoint_every=args.checkpoint_every, lease_seconds=args.lease, reclaim=args.reclaim)
+
+    for key, value in sweep_status(args.db).items():
+        print(f"{key}: {value}")
+
+if __name__ == "__main__":
+    main()
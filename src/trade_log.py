@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import logging
+import streamlit as st
+from functools import partial
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+# Export format -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "Arrow IPC": ("arrow", "application/vnd.apache.arrow.file"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet")
+}
+
+
+def filter_trade_log(results, statuses=None, signals=None, start_date=None, end_date=None):
+
+    # Build a row mask and return positions, so no rows are copied until a page is taken
+    mask = np.ones(len(results), dtype=bool)
+    if statuses:
+        mask &= results['Status'].isin(statuses).to_numpy()
+    if signals:
+        mask &= results['Signal'].isin(signals).to_numpy()
+    if start_date is not None:
+        mask &= results.index >= pd.Timestamp(start_date)
+    if end_date is not None:
+        mask &= results.index <= pd.Timestamp(end_date)
+
+    return np.flatnonzero(mask)
+
+def page_trade_log(results, positions, page, page_size):
+
+    n_pages = max(1, -(-len(positions) // page_size))
+    page = min(max(page, 1), n_pages)
+
+    return results.iloc[positions[(page - 1) * page_size:page * page_size]], n_pages
+
+def export_trade_log(results, export_format, positions=None):
+
+    # Only take the filtered rows when a filter actually removed some
+    if positions is not None and len(positions) < len(results):
+        results = results.iloc[positions]
+
+    table = pa.Table.from_pandas(results, preserve_index=True)
+    sink = pa.BufferOutputStream()
+
+    if export_format == "Arrow IPC":
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    elif export_format == "Parquet":
+        pq.write_table(table, sink, compression='zstd')
+    else:
+        raise ValueError(f"Unsupported export format: {export_format}")
+
+    return sink.getvalue().to_pybytes()
+
+# A fragment reruns on its own, so paging, filtering and export changes redraw only the table
+# instead of rerunning the whole script and its backtest
+@st.fragment
+def display_trade_log(results):
+
+    if results is None or results.empty:
+        logging.warning("No valid results data for the trade log")
+        return
+
+    st.subheader("Trade Log")
+
+    # Filters are applied on the server, so only the visible page is sent to the browser
+    col1, col2 = st.columns(2)
+    with col1:
+        statuses = st.multiselect("Status", sorted(results['Status'].unique()), key='trade_log_status')
+    with col2:
+        signals = st.multiselect("Signal", sorted(results['Signal'].unique()), key='trade_log_signal')
+
+    first_date = results.index.min().date()
+    last_date = results.index.max().date()
+    date_range = st.date_input(
+        "Date Range",
+        value=(first_date, last_date),
+        min_value=first_date,
+        max_value=last_date,
+        key='trade_log_dates'
+    )
+
+    # The date picker returns a single date while a range is still being selected
+    start_date, end_date = (date_range[0], date_range[-1]) if len(date_range) else (None, None)
+
+    positions = filter_trade_log(results, statuses, signals, start_date, end_date)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        page_size = st.selectbox("Rows per Page", PAGE_SIZES, key='trade_log_page_size')
+    n_pages = max(1, -(-len(positions) // page_size))
+
+    # Narrower filters can leave the remembered page past the end
+    if st.session_state.get('trade_log_page', 1) > n_pages:
+        st.session_state['trade_log_page'] = n_pages
+    with col2:
+        page = st.number_input("Page", min_value=1, max_value=n_pages, key='trade_log_page')
+
+    view, n_pages = page_trade_log(results, positions, page, page_size)
+
+    if len(positions) > 0:
+        first_row = (min(page, n_pages) - 1) * page_size + 1
+        st.caption(f"Showing rows {first_row}-{first_row + len(view) - 1} of {len(positions)} "
+                   f"({len(results)} in full log)")
+    else:
+        st.caption("No trades match the selected filters")
+
+    st.dataframe(view)
+
+    # The export is only serialised when the download button is clicked
+    col1, col2 = st.columns(2)
+    with col1:
+        export_format = st.selectbox("Export Format", list(EXPORT_FORMATS), key='trade_log_export_format')
+    extension, mime = EXPORT_FORMATS[export_format]
+    with col2:
+        st.download_button(
+            "Export Filtered Trade Log",
+            data=partial(export_trade_log, results, export_format, positions),
+            file_name=f"pairs_trading_results.{extension}",
+            mime=mime
+        )
@@ -3,12 +3,51 @@ import pandas as pd
 import statsmodels.api as sm
 from statsmodels.tsa.stattools import adfuller
 import logging
+from functools import partial
 
-from src.data import read_price_data, validate_lookback_period
-from src.user_inputs import get_params, validate_params
+from src.data import (
+    floored_windows, read_price_pyramid, resample_price_data, scale_window_params, validate_lookback_period
+)
+from src.diagnostics import DiagnosticsLog
+from src.kalman import KalmanHedgeRatio
+from src.scheduling import CointegrationScheduler, kalman_overrides, kalman_schedule
+from src.user_inputs import DEFAULT_PARAMS, get_params, validate_params
 
 
-def cointegration_test(df1, df2, lookback_period, current_idx):
+# Integer status codes used inside the engines; the string labels are only used at the edges
+STATUS_HOLD, STATUS_BUY, STATUS_SELL, STATUS_SL, STATUS_TP, STATUS_CB = 0, 1, 2, 3, 4, 5
+NO_STATUS = -1
+STATUS_LABELS = ("HOLD", "BUY", "SELL", "SL", "TP", "CB")
+SIGNAL_LABELS = STATUS_LABELS[:3]
+STATUS_CODES = {label: code for code, label in enumerate(STATUS_LABELS)}
+SIGNAL_CODES = {0: STATUS_HOLD, 1: STATUS_BUY, -1: STATUS_SELL}
+
+
+class PositionState:
+    """Position state carried from one bar to the next, with the status as an integer code."""
+
+    __slots__ = ('status', 'buy_price', 'sell_price')
+
+    def __init__(self, status=NO_STATUS, buy_price=None, sell_price=None):
+        self.status = status
+        self.buy_price = buy_price
+        self.sell_price = sell_price
+
+
+def _status_code(status):
+    return NO_STATUS if status is None else STATUS_CODES.get(status, NO_STATUS)
+
+def _status_label(status):
+
+    # NO_STATUS (-1) would otherwise index the last label and read as "CB"
+    return "None" if status == NO_STATUS else STATUS_LABELS[status]
+
+def _diagnostics(log):
+
+    # Calls outside a strategy run get a private log, so no diagnostics state is shared between runs
+    return log if log is not None else DiagnosticsLog(logging.getLogger(__name__))
+
+def cointegration_test(df1, df2, lookback_period, current_idx, log=None):
     
     # Calculate start index based on lookback period
     start_idx = max(0, current_idx - lookback_period)
@@ -27,8 +66,9 @@ def cointegration_test(df1, df2, lookback_period, current_idx):
     is_cointegrated = adf_result[0] <= adf_result[4]['5%'] and adf_result[1] <= 0.05
 
     if not is_cointegrated:
-        logging.warning(f"Assets are not cointegrated at current window (index {current_idx})")
-        logging.warning(f"ADF test statistic: {adf_result[0]}, Critical value (5%): {adf_result[4]['5%']}, p-value: {adf_result[1]}")
+        _diagnostics(log).event("coint.not_cointegrated", "Assets are not cointegrated at current window (index %d). "
+                                "ADF test statistic: %s, Critical value (5%%): %s, p-value: %s",
+                                current_idx, adf_result[0], adf_result[4]['5%'], adf_result[1], level=logging.WARNING)
 
     return adf_result, is_cointegrated
 
@@ -53,144 +93,169 @@ def calculate_zscore(df1, df2, zscore_start_idx, zscore_end_idx):
     
     return zscore
 
-def generate_signal(zscore, threshold, is_cointegrated):
+def generate_signal(zscore, threshold, is_cointegrated, log=None):
 
     # Validate inputs
     if zscore is None:
-        logging.warning("Z-score calculation must be run before generating signals")
+        _diagnostics(log).event("signal.missing_zscore", "Z-score calculation must be run before generating signals", level=logging.WARNING)
         return 0, "HOLD"
         
     # Check cointegration status first
     if not is_cointegrated:
-        logging.warning("Assets are not cointegrated - no trading signal generated")
+        _diagnostics(log).event("signal.not_cointegrated", "Assets are not cointegrated - no trading signal generated", level=logging.WARNING)
         return 0, "HOLD"
     
     # Generate signals based on z-score
     if zscore > threshold:
-        logging.info(f"SELL signal generated: z-score ({zscore:.2f}) > threshold ({threshold})")
+        _diagnostics(log).event("signal.sell", "SELL signal generated: z-score (%.2f) > threshold (%s)", zscore, threshold)
         return -1, "SELL"
     elif zscore < -threshold:
-        logging.info(f"BUY signal generated: z-score ({zscore:.2f}) < -threshold ({-threshold})")
+        _diagnostics(log).event("signal.buy", "BUY signal generated: z-score (%.2f) < -threshold (%s)", zscore, -threshold)
         return 1, "BUY"
     else:
-        logging.info(f"HOLD signal: z-score ({zscore:.2f}) within threshold range ({-threshold} to {threshold})")
+        _diagnostics(log).event("signal.hold", "HOLD signal: z-score (%.2f) within threshold range (%s to %s)", zscore, -threshold, threshold)
         return 0, "HOLD"
 
-def update_status(prev_status, mtm, stop_loss, take_profit, signal, is_cointegrated):
+def _update_status_code(prev_status, mtm, stop_loss, take_profit, signal, is_cointegrated, log=None):
 
     # Handle initial case or reset cases
-    if prev_status is None or prev_status in ["HOLD", "SL", "TP", "CB"]:
+    if prev_status != STATUS_BUY and prev_status != STATUS_SELL:
         return signal
     
     # Check for cointegration break
     if not is_cointegrated:
-        logging.info("Cointegration break detected - closing position")
-        return "CB"  # Cointegration Break
+        _diagnostics(log).event("status.cb", "Cointegration break detected - closing position")
+        return STATUS_CB
     
     # Check for stop loss or take profit if MTM is available
     if mtm is not None:
         # Check for stop loss
         if mtm < stop_loss:
-            logging.info(f"Stop loss triggered: MTM ({mtm}) < stop loss ({stop_loss})")
-            return "SL"  # Stop Loss
+            _diagnostics(log).event("status.sl", "Stop loss triggered: MTM (%s) < stop loss (%s)", mtm, stop_loss)
+            return STATUS_SL
         
         # Check for take profit
         if mtm > take_profit:
-            logging.info(f"Take profit triggered: MTM ({mtm}) > take profit ({take_profit})")
-            return "TP"  # Take Profit
+            _diagnostics(log).event("status.tp", "Take profit triggered: MTM (%s) > take profit (%s)", mtm, take_profit)
+            return STATUS_TP
     
     # If none of the above conditions are met, maintain previous status
     return prev_status
-    
-def calculate_buy_price(prev_status, prev_buy_price, signal, status, df1, df2, current_idx):
 
-    # If status hasn't changed, maintain the previous buy price
-    if status == prev_status:
-        logging.info(f"Status unchanged ({status}), maintaining previous buy price: {prev_buy_price}")
-        return prev_buy_price
+def _entry_prices(prev, signal, status, price1, price2, log=None):
+
+    # If status hasn't changed, maintain the previous prices
+    if status == prev.status:
+        _diagnostics(log).event("entry_price.unchanged", "Status unchanged (%s), maintaining previous buy/sell prices: %s/%s",
+                                _status_label(status), prev.buy_price, prev.sell_price)
+        return prev.buy_price, prev.sell_price
     
-    # No buy price needed for these statuses
-    if status in ["SL", "TP", "CB", "HOLD"]:
-        logging.info(f"No buy price needed for status: {status}")
-        return None
+    # No prices needed unless a position is opened
+    if status != STATUS_BUY and status != STATUS_SELL:
+        _diagnostics(log).event("entry_price.none", "No buy/sell price needed for status: %s", _status_label(status))
+        return None, None
     
-    # Calculate buy price based on signal
-    if signal == "BUY":
-        buy_price = df1['Close'].iloc[current_idx]
-        logging.info(f"BUY signal: Setting buy price to asset 1 close price: {buy_price}")
-        return buy_price
-    elif signal == "SELL":
-        buy_price = df2['Close'].iloc[current_idx]
-        logging.info(f"SELL signal: Setting buy price to asset 2 close price: {buy_price}")
-        return buy_price
+    # BUY goes long asset 1 and short asset 2, SELL the reverse
+    if signal == STATUS_BUY:
+        _diagnostics(log).event("entry_price.buy", "BUY signal: Setting buy/sell price to asset 1/asset 2 close price: %s/%s", price1, price2)
+        return price1, price2
+    elif signal == STATUS_SELL:
+        _diagnostics(log).event("entry_price.sell", "SELL signal: Setting buy/sell price to asset 2/asset 1 close price: %s/%s", price2, price1)
+        return price2, price1
     else:
-        logging.warning(f"Unrecognized signal: {signal}, cannot calculate buy price")
-        return None
-        
-def calculate_sell_price(prev_status, prev_sell_price, signal, status, df1, df2, current_idx):
+        _diagnostics(log).event("entry_price.unrecognized", "Unrecognized signal code: %s, cannot calculate buy/sell prices",
+                                signal, level=logging.WARNING)
+        return None, None
 
-    # If status hasn't changed, maintain the previous sell price
-    if status == prev_status:
-        logging.info(f"Status unchanged ({status}), maintaining previous sell price: {prev_sell_price}")
-        return prev_sell_price
-    
-    # No sell price needed for these statuses
-    if status in ["SL", "TP", "CB", "HOLD"]:
-        logging.info(f"No sell price needed for status: {status}")
+def _mtm(prev, lot_size_1, lot_size_2, price1, price2, log=None):
+
+    if prev.sell_price is None or prev.buy_price is None:
+        _diagnostics(log).event("mtm.no_prices", "No previous prices available for MTM calculation")
         return None
     
-    # Calculate sell price based on signal
-    if signal == "BUY":
-        sell_price = df2['Close'].iloc[current_idx]
-        logging.info(f"BUY signal: Setting sell price to asset 2 close price: {sell_price}")
-        return sell_price
-    elif signal == "SELL":
-        sell_price = df1['Close'].iloc[current_idx]
-        logging.info(f"SELL signal: Setting sell price to asset 1 close price: {sell_price}")
-        return sell_price
+    # Calculate MTM based on previous status
+    if prev.status == STATUS_BUY:
+        mtm = (prev.sell_price - price2) * lot_size_2 + (price1 - prev.buy_price) * lot_size_1
+        _diagnostics(log).event("mtm.buy", "BUY position MTM: %s", mtm)
+        return mtm
+    elif prev.status == STATUS_SELL:
+        mtm = (prev.sell_price - price1) * lot_size_1 + (price2 - prev.buy_price) * lot_size_2
+        _diagnostics(log).event("mtm.sell", "SELL position MTM: %s", mtm)
+        return mtm
     else:
-        logging.warning(f"Unrecognized signal: {signal}, cannot calculate sell price")
+        _diagnostics(log).event("mtm.no_position", "No active position (status code: %s), MTM not applicable", prev.status)
         return None
+
+def update_status(prev_status, mtm, stop_loss, take_profit, signal, is_cointegrated, log=None):
+
+    status = _update_status_code(_status_code(prev_status), mtm, stop_loss, take_profit,
+                                 _status_code(signal), is_cointegrated, log)
+
+    return signal if status == NO_STATUS else STATUS_LABELS[status]
     
-def calculate_mtm(df1, df2, prev_status, prev_sell_price, prev_buy_price, lot_size_1, lot_size_2, current_idx):
+def calculate_buy_price(prev_status, prev_buy_price, signal, status, df1, df2, current_idx, log=None):
 
-    # Validators to ensure accuracy of parameters before mtm calculation
-    if current_idx < 0 or current_idx >= len(df1) or current_idx >= len(df2):
-        logging.warning(f"Invalid index {current_idx} for calculating MTM")
-        return None
+    prev = PositionState(_status_code(prev_status), buy_price=prev_buy_price)
+    buy_price, _ = _entry_prices(prev, _status_code(signal), _status_code(status),
+                                 df1['Close'].iloc[current_idx], df2['Close'].iloc[current_idx], log)
+    return buy_price
         
-    if prev_sell_price is None or prev_buy_price is None:
-        logging.info("No previous prices available for MTM calculation")
-        return None
+def calculate_sell_price(prev_status, prev_sell_price, signal, status, df1, df2, current_idx, log=None):
+
+    prev = PositionState(_status_code(prev_status), sell_price=prev_sell_price)
+    _, sell_price = _entry_prices(prev, _status_code(signal), _status_code(status),
+                                  df1['Close'].iloc[current_idx], df2['Close'].iloc[current_idx], log)
+    return sell_price
     
-    # Calculate MTM based on previous status
-    if prev_status == "BUY":
-        mtm = (prev_sell_price - df2['Close'].iloc[current_idx]) * lot_size_2 + \
-              (df1['Close'].iloc[current_idx] - prev_buy_price) * lot_size_1
-        logging.info(f"BUY position MTM: {mtm}")
-        return mtm
-    elif prev_status == "SELL":
-        mtm = (prev_sell_price - df1['Close'].iloc[current_idx]) * lot_size_1 + \
-              (df2['Close'].iloc[current_idx] - prev_buy_price) * lot_size_2
-        logging.info(f"SELL position MTM: {mtm}")
-        return mtm
-    else:
-        logging.info(f"No active position (status: {prev_status}), MTM not applicable")
+def calculate_mtm(df1, df2, prev_status, prev_sell_price, prev_buy_price, lot_size_1, lot_size_2, current_idx,
+                  log=None):
+
+    # Validators to ensure accuracy of parameters before mtm calculation
+    if current_idx < 0 or current_idx >= len(df1) or current_idx >= len(df2):
+        _diagnostics(log).event("mtm.invalid_index", "Invalid index %d for calculating MTM", current_idx, level=logging.WARNING)
         return None
+
+    prev = PositionState(_status_code(prev_status), prev_buy_price, prev_sell_price)
+    return _mtm(prev, lot_size_1, lot_size_2, df1['Close'].iloc[current_idx], df2['Close'].iloc[current_idx], log)
     
-def run_strategy():
+def run_strategy(params=None, df1=None, df2=None, save_results=True, log=None):
 
-    #Get user parameters
-    params = get_params()
+    # Get user parameters unless supplied by the caller
+    if params is None:
+        params = get_params()
     
-    # Read price data
+    resolution = params.get('resolution', DEFAULT_PARAMS['resolution'])
+
+    # Read price data at the requested resolution unless supplied by the caller
     try:
-        df1, df2 = read_price_data()
-        logging.info(f"Successfully loaded data: Asset1 ({len(df1)} rows), Asset2 ({len(df2)} rows)")
+        if df1 is None or df2 is None:
+            pyramid = read_price_pyramid()
+            base_rows = len(pyramid['Daily'][0])
+            df1, df2 = pyramid[resolution]
+        else:
+            base_rows = len(df1)
+            df1, df2 = resample_price_data(df1, df2, resolution)
+        logging.info(f"Successfully loaded {resolution} data: Asset1 ({len(df1)} rows), Asset2 ({len(df2)} rows)")
     except Exception as e:
         logging.error(f"Failed to read price data: {e}")
         return None
     
+    # Validate parameters
+    is_valid, error_message = validate_params(params)
+    if not is_valid:
+        logging.error(f"Parameter validation failed: {error_message}")
+        return None
+
+    # Rescale day-based windows to the bar resolution
+    if resolution != 'Daily':
+        floored = floored_windows(params, base_rows / len(df1))
+        if floored:
+            logging.warning(f"{', '.join(floored)} raised to the minimum bar count at {resolution} resolution; "
+                            f"the requested values have no effect")
+        params = scale_window_params(params, base_rows / len(df1))
+        logging.info(f"Windows rescaled to {resolution} bars: lookback {params['lookback_period']}, "
+                     f"initial window {params['initial_start']}-{params['initial_end']}")
+
     # Extract parameters
     threshold = params['threshold']
     lookback_period = params['lookback_period']
@@ -200,102 +265,150 @@ def run_strategy():
     lot_size_2 = params['lot_size_2']
     stop_loss = params['stop_loss']
     take_profit = params['take_profit']
-
-    # Validate parameters
-    is_valid, error_message = validate_params(params)
-    if not is_valid:
-        logging.error(f"Parameter validation failed: {error_message}")
-        return None
+    hedge_ratio_mode = params.get('hedge_ratio_mode', DEFAULT_PARAMS['hedge_ratio_mode'])
+    coint_retest_interval = params.get('coint_retest_interval', DEFAULT_PARAMS['coint_retest_interval'])
+    coint_drift_monitor = params.get('coint_drift_monitor', DEFAULT_PARAMS['coint_drift_monitor'])
+    debug_diagnostics = params.get('debug_diagnostics', DEFAULT_PARAMS['debug_diagnostics'])
 
     # Validate lookback period against available data
-    if not validate_lookback_period(df1, df2, lookback_period):
+    if not validate_lookback_period(df1, df2, lookback_period) or len(df1) <= initial_end:
         logging.error(f"Lookback period {lookback_period} exceeds available data")
         return None
     
+    # Diagnostics go to this run's own log (the caller's, to render it afterwards, or a new one);
+    # debug mode keeps every event in its ring buffer
+    log = _diagnostics(log)
+    log.configure(debug=debug_diagnostics)
+    log.reset()
+
     # Initialize variables
-    prev_status = None
-    prev_buy_price = None
-    prev_sell_price = None
+    prev = PositionState()
     pnl = 0
 
-    # Create results dataframe
-    results = pd.DataFrame(columns=[
-        'Date', 'Asset1_Price', 'Asset2_Price', 'Z-Score', 
-        'Signal_Value', 'Signal', 'Status', 'Buy_Price', 
-        'Sell_Price', 'MTM', 'PnL', 'Is_Cointegrated'
-    ])
+    # Per-day columns of the results table, with Status and Signal stored as integer codes
+    n_days = len(df1) - initial_end
+    closes1 = df1['Close'].to_numpy(dtype=float)
+    closes2 = df2['Close'].to_numpy(dtype=float)
+    zscores = np.empty(n_days)
+    signal_values = np.empty(n_days, dtype=np.int8)
+    signal_codes = np.empty(n_days, dtype=np.int8)
+    status_codes = np.empty(n_days, dtype=np.int8)
+    buy_prices = np.full(n_days, np.nan)
+    sell_prices = np.full(n_days, np.nan)
+    mtms = np.full(n_days, np.nan)
+    pnls = np.empty(n_days)
+    cointegrated = np.empty(n_days, dtype=bool)
 
     # Set initial window indices
     start_idx = initial_start
     end_idx = initial_end
 
+    # Warm up the Kalman filter on the history before the first trading day; its forecast
+    # error then drives the drift monitor, so the OLS refit and ADF test only run sparsely
+    kalman = None
+    if hedge_ratio_mode == "Kalman":
+        kalman = KalmanHedgeRatio().warm_up(closes1[:end_idx], closes2[:end_idx])
+        overridden = kalman_overrides(coint_retest_interval, coint_drift_monitor)
+        coint_retest_interval, coint_drift_monitor = kalman_schedule(coint_retest_interval, coint_drift_monitor)
+        if overridden:
+            logging.warning(f"{', '.join(overridden)} overridden in Kalman mode: re-testing every "
+                            f"{coint_retest_interval} bars with the {coint_drift_monitor} drift monitor")
+
+    # Schedule cointegration re-tests, carrying the last verdict forward in between
+    scheduler = CointegrationScheduler(partial(cointegration_test, log=log), coint_retest_interval, coint_drift_monitor,
+                                       log=log)
+
     # Run strategy for each day
-    for current_idx in range(end_idx, len(df1)):
-        logging.info(f"Processing day {current_idx}, date: {df1.index[current_idx]}")
+    for row, current_idx in enumerate(range(end_idx, len(df1))):
+        log.event("day", "Processing day %d, date: %s", current_idx, df1.index[current_idx])
+        price1 = closes1[current_idx]
+        price2 = closes2[current_idx]
 
-        # Test for cointegration
-        adf_result, is_cointegrated = cointegration_test(df1, df2, lookback_period, current_idx)
-        
         # Calculate z-score
-        zscore = calculate_zscore(df1, df2, start_idx, current_idx)
+        if kalman is not None:
+            zscore = kalman.update(price1, price2)
+        else:
+            zscore = calculate_zscore(df1, df2, start_idx, current_idx)
+
+        # Test for cointegration, with the Kalman z-score as the drift score in Kalman mode
+        adf_result, is_cointegrated = scheduler.check(df1, df2, lookback_period, current_idx,
+                                                      zscore if kalman is not None else None)
 
         # Generate signal
-        signal_value, signal = generate_signal(zscore, threshold, is_cointegrated)
+        signal_value, _ = generate_signal(zscore, threshold, is_cointegrated, log)
+        signal = SIGNAL_CODES[signal_value]
         
         # Calculate MTM
-        mtm = calculate_mtm(df1, df2, prev_status, prev_sell_price, prev_buy_price, 
-                           lot_size_1, lot_size_2, current_idx)
+        mtm = _mtm(prev, lot_size_1, lot_size_2, price1, price2, log)
         
         # Update status
-        status = update_status(prev_status, mtm, stop_loss, take_profit, signal, is_cointegrated)
+        status = _update_status_code(prev.status, mtm, stop_loss, take_profit, signal, is_cointegrated, log)
         
         # Calculate buy and sell prices
-        buy_price = calculate_buy_price(prev_status, prev_buy_price, signal, status, 
-                                       df1, df2, current_idx)
-        
-        sell_price = calculate_sell_price(prev_status, prev_sell_price, signal, status, 
-                                         df1, df2, current_idx)
+        buy_price, sell_price = _entry_prices(prev, signal, status, price1, price2, log)
 
         # Calculate PnL
-        if status in ["TP", "SL", "CB"] and mtm is not None:
+        if status in (STATUS_SL, STATUS_TP, STATUS_CB) and mtm is not None:
             pnl += mtm
-            logging.info(f"Position closed: {status}, MTM: {mtm}, Total PnL: {pnl}")
+            log.event("position.closed", "Position closed: %s, MTM: %s, Total PnL: %s", STATUS_LABELS[status], mtm, pnl)
+
+        # Full per-bar snapshot, only captured in debug mode
+        if log.debug:
+            log.event("bar", "Bar %d: z-score %s, signal %s, status %s, buy %s, sell %s, MTM %s, PnL %s, cointegrated %s",
+                      current_idx, zscore, SIGNAL_LABELS[signal], _status_label(status), buy_price, sell_price,
+                      mtm, pnl, is_cointegrated, level=logging.DEBUG)
 
         # Store results
-        results.loc[current_idx] = [
-            df1.index[current_idx],
-            df1['Close'].iloc[current_idx],
-            df2['Close'].iloc[current_idx],
-            zscore,
-            signal_value,
-            signal,
-            status,
-            buy_price,
-            sell_price,
-            mtm,
-            pnl,
-            is_cointegrated
-        ]
+        zscores[row] = zscore
+        signal_values[row] = signal_value
+        signal_codes[row] = signal
+        status_codes[row] = status
+        if buy_price is not None:
+            buy_prices[row] = buy_price
+            sell_prices[row] = sell_price
+        if mtm is not None:
+            mtms[row] = mtm
+        pnls[row] = pnl
+        cointegrated[row] = is_cointegrated
 
         # Update previous values for next iteration
-        prev_status = status
-        prev_buy_price = buy_price
-        prev_sell_price = sell_price
+        prev.status = status
+        prev.buy_price = buy_price
+        prev.sell_price = sell_price
         
         # Update window indices
         start_idx += 1
     
-    # Set date as index
-    results.set_index('Date', inplace=True)
+    # Build the results table once, with the labels as categoricals over the integer codes
+    results = pd.DataFrame({
+        'Asset1_Price': closes1[end_idx:],
+        'Asset2_Price': closes2[end_idx:],
+        'Z-Score': zscores,
+        'Signal_Value': signal_values,
+        'Signal': pd.Categorical.from_codes(signal_codes, categories=SIGNAL_LABELS),
+        'Status': pd.Categorical.from_codes(status_codes, categories=STATUS_LABELS),
+        'Buy_Price': buy_prices,
+        'Sell_Price': sell_prices,
+        'MTM': mtms,
+        'PnL': pnls,
+        'Is_Cointegrated': cointegrated
+    }, index=df1.index[end_idx:].rename('Date'))
     
     logging.info(f"Strategy completed with final PnL: {pnl}")
+
+    schedule_report = scheduler.report()
+    logging.info(f"Cointegration tests run: {schedule_report['ADF Calls']} of {schedule_report['Bars']} days "
+                 f"({schedule_report['ADF Calls Saved']} saved, {schedule_report['Triggered Tests']} triggered by drift monitor)")
+
+    log.summary()
     
     # Save results to CSV
-    try:
-        results.to_csv('pairs_trading_results.csv')
-        logging.info("Results saved to pairs_trading_results.csv")
-    except Exception as e:
-        logging.warning(f"Failed to save results to CSV: {e}")
+    if save_results:
+        try:
+            results.to_csv('pairs_trading_results.csv')
+            logging.info("Results saved to pairs_trading_results.csv")
+        except Exception as e:
+            logging.warning(f"Failed to save results to CSV: {e}")
     
     return results
 
@@ -1,4 +1,28 @@
 import streamlit as st
+import logging
+
+from src.data import floored_windows, read_price_pyramid, scale_window_params
+from src.scheduling import DRIFT_MONITORS, kalman_overrides, kalman_schedule
+
+# Sidebar defaults, also used when the engine is driven without the dashboard
+DEFAULT_PARAMS = {
+    'threshold': 1.25,
+    'lookback_period': 40,
+    'initial_start': 10,
+    'initial_end': 30,
+    'lot_size_1': 5000,
+    'lot_size_2': 5000,
+    'stop_loss': -10000,
+    'take_profit': 20000,
+    'hedge_ratio_mode': "Log Ratio",
+    'coint_retest_interval': 1,
+    'coint_drift_monitor': "None",
+    'resolution': "Daily",
+    'debug_diagnostics': False
+}
+
+HEDGE_RATIO_MODES = ["Log Ratio", "Kalman"]
+BAR_RESOLUTIONS = ["Daily", "Weekly", "Monthly"]
 
 def get_params():
     st.sidebar.header("Strategy Parameters")
@@ -6,13 +30,13 @@ def get_params():
     params = {
         'threshold': st.sidebar.slider(
             "Z-score Threshold", 
-            1.0, 3.0, 1.25, 
+            1.0, 3.0, DEFAULT_PARAMS['threshold'], 
             help="Determines when to enter/exit trades. Higher values (e.g., 2.0) are more conservative, requiring larger divergences. Lower values (e.g., 1.0) generate more frequent trades but may include false signals."
         ),
         
         'lookback_period': st.sidebar.slider(
             "Lookback Period", 
-            40, 120, 40, 
+            40, 120, DEFAULT_PARAMS['lookback_period'], 
             help="Number of days used to calculate statistical relationships. Shorter periods (40-60 days) adapt quickly to changing markets but may be less stable. Longer periods (80-120 days) provide more statistical robustness but react slower to market changes."
         ),
         
@@ -20,7 +44,7 @@ def get_params():
             "Initial Start Index", 
             min_value=0, 
             max_value=100, 
-            value=10, 
+            value=DEFAULT_PARAMS['initial_start'], 
             help="Starting point within the lookback period for initial z-score calculation. This creates a 'training window' for establishing the baseline relationship between assets."
         ),
         
@@ -28,37 +52,112 @@ def get_params():
             "Initial End Index", 
             min_value=10, 
             max_value=110, 
-            value=30, 
+            value=DEFAULT_PARAMS['initial_end'], 
             help="Ending point within the lookback period for initial z-score calculation. The difference between end and start indices determines the size of the training window."
         ),
         
         'lot_size_1': st.sidebar.number_input(
             "Lot Size (Aluminium)", 
-            1000, 10000, 5000, 
+            1000, 10000, DEFAULT_PARAMS['lot_size_1'], 
             help="Trading quantity for Aluminium in USD. Larger lot sizes increase potential profit/loss and affect the capital efficiency of the strategy."
         ),
         
         'lot_size_2': st.sidebar.number_input(
             "Lot Size (Lead)", 
-            1000, 10000, 5000, 
+            1000, 10000, DEFAULT_PARAMS['lot_size_2'], 
             help="Trading quantity for Lead in USD. Ideally balanced with Aluminium lot size to create a market-neutral position that hedges against overall market movements."
         ),
         
         'stop_loss': st.sidebar.number_input(
             "Stop Loss", 
-            -20000, 0, -10000, 
+            -20000, 0, DEFAULT_PARAMS['stop_loss'], 
             help="Maximum acceptable loss in USD before automatically exiting a trade. More negative values allow more room for the strategy to work through temporary adverse movements."
         ),
         
         'take_profit': st.sidebar.number_input(
             "Take Profit", 
-            0, 50000, 20000, 
+            0, 50000, DEFAULT_PARAMS['take_profit'], 
             help="Target profit in USD at which the strategy automatically exits a profitable trade. Higher values allow trades to capture more profit from strong convergence moves."
+        ),
+
+        'hedge_ratio_mode': st.sidebar.selectbox(
+            "Hedge Ratio Mode",
+            HEDGE_RATIO_MODES,
+            index=HEDGE_RATIO_MODES.index(DEFAULT_PARAMS['hedge_ratio_mode']),
+            help="How the spread behind the z-score is built. Log Ratio uses the rolling log price ratio over the initial window. Kalman tracks a dynamic hedge ratio with a Kalman filter updated once per bar, and scores each bar's spread against the filter's forecast variance, with the spread's noise estimated from recent bars. In Kalman mode the filter's z-score also drives the drift monitor (Variance unless one is selected), and cointegration is re-tested at least every 20 bars; a warning below shows when this overrides the re-test settings."
+        ),
+
+        'coint_retest_interval': st.sidebar.slider(
+            "Cointegration Re-test Interval",
+            1, 20, DEFAULT_PARAMS['coint_retest_interval'],
+            help="Number of days between cointegration tests. The last verdict is carried forward in between. 1 re-tests every day; larger values skip redundant tests on heavily overlapping windows at the cost of reacting later to a broken relationship. Kalman mode re-tests at least every 20 bars."
+        ),
+
+        'coint_drift_monitor': st.sidebar.selectbox(
+            "Drift Monitor",
+            DRIFT_MONITORS,
+            index=DRIFT_MONITORS.index(DEFAULT_PARAMS['coint_drift_monitor']),
+            help="Cheap per-day check that forces an early cointegration re-test when the spread drifts away from the last fitted relationship. Variance watches the recent residual variance, CUSUM watches for a persistent shift in the residual mean."
+        ),
+
+        'resolution': st.sidebar.selectbox(
+            "Bar Resolution",
+            BAR_RESOLUTIONS,
+            index=BAR_RESOLUTIONS.index(DEFAULT_PARAMS['resolution']),
+            help="Bar size the backtest runs on. Weekly and Monthly bars are resampled from the daily data for fast exploratory runs. The lookback period and initial window indices are rescaled to the coarser bars, with a floor of 20 bars for the cointegration windows; the windows actually used are shown below."
+        ),
+
+        'debug_diagnostics': st.sidebar.checkbox(
+            "Debug Diagnostics",
+            value=DEFAULT_PARAMS['debug_diagnostics'],
+            help="Capture every per-day diagnostic event (signals, status changes, prices, MTM) in memory and show them below the trade log. Off by default, since normal runs only log the first few events of each type plus an end-of-run summary."
         )
     }
+
+    if params['resolution'] != 'Daily':
+        display_effective_windows(params)
+    if params['hedge_ratio_mode'] == "Kalman":
+        display_kalman_schedule(params)
     
     return params
 
+def display_effective_windows(params: dict):
+
+    try:
+        pyramid = read_price_pyramid()
+    except Exception as e:
+        logging.error(f"Failed to read price data: {e}")
+        return
+
+    resolution = params['resolution']
+    n_bars = len(pyramid[resolution][0])
+    bars_per_period = len(pyramid['Daily'][0]) / n_bars
+    scaled = scale_window_params(params, bars_per_period)
+
+    # The rescaled windows are what the backtest runs on, so show them next to the day-based inputs
+    st.sidebar.caption(
+        f"At {resolution} resolution ({n_bars} bars): lookback {scaled['lookback_period']} bars, "
+        f"initial window bars {scaled['initial_start']}-{scaled['initial_end']}, "
+        f"{max(0, n_bars - scaled['initial_end'])} bars traded."
+    )
+
+    floored = floored_windows(params, bars_per_period)
+    if floored:
+        st.sidebar.warning(
+            f"The sidebar values for {', '.join(floored)} fall below the minimum window at {resolution} resolution "
+            f"and are raised to it, so changing them has no effect. Use a finer resolution to control them."
+        )
+
+def display_kalman_schedule(params: dict):
+
+    overridden = kalman_overrides(params['coint_retest_interval'], params['coint_drift_monitor'])
+    if overridden:
+        retest_interval, drift_monitor = kalman_schedule(params['coint_retest_interval'], params['coint_drift_monitor'])
+        st.sidebar.warning(
+            f"Kalman mode re-tests cointegration every {retest_interval} bars with the {drift_monitor} drift monitor, "
+            f"so the sidebar values for {', '.join(overridden)} are overridden and changing them has no effect."
+        )
+
 def validate_params(params: dict) -> tuple[bool, str]:
 
     # Check that initial_end > initial_start
@@ -87,6 +186,20 @@ def validate_params(params: dict) -> tuple[bool, str]:
         return False, "Stop Loss should be negative"
     if params['take_profit'] <= 0:
         return False, "Take Profit should be positive"
+
+    # Check that the hedge ratio mode is supported
+    if params.get('hedge_ratio_mode', DEFAULT_PARAMS['hedge_ratio_mode']) not in HEDGE_RATIO_MODES:
+        return False, f"Hedge Ratio Mode should be one of {', '.join(HEDGE_RATIO_MODES)}"
+
+    # Check the cointegration re-test schedule
+    if params.get('coint_retest_interval', DEFAULT_PARAMS['coint_retest_interval']) < 1:
+        return False, "Cointegration Re-test Interval should be at least 1"
+    if params.get('coint_drift_monitor', DEFAULT_PARAMS['coint_drift_monitor']) not in DRIFT_MONITORS:
+        return False, f"Drift Monitor should be one of {', '.join(DRIFT_MONITORS)}"
+
+    # Check that the bar resolution is supported
+    if params.get('resolution', DEFAULT_PARAMS['resolution']) not in BAR_RESOLUTIONS:
+        return False, f"Bar Resolution should be one of {', '.join(BAR_RESOLUTIONS)}"
     
     # All checks passed
     return True, ""    
\ No newline at end of file